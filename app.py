@@ -1,129 +1,148 @@
-from flask import Flask, request, jsonify, render_template
+from flask import Flask, Response, request, jsonify, send_file, stream_with_context
 from flask_cors import CORS
 import os
-import csv
+import math
 from datetime import datetime
 from config import Config
 from models import db, Product, Webhook, UploadLog
-import requests
-import threading
+from change_feed import changes_since, delete_all_products, wait_for_changes
+from importer import ProductImporter, csv_compression, open_csv_rows
+from dashboard_assets import DashboardAssets
+from response_compression import compress_response
+from chunked_upload import ChunkedUpload, UploadError, error_report_path, new_upload_id, prune_stale_uploads
 import json
+import time
+from functools import wraps
+from ipv6_workaround import apply_ipv6_workaround
+from db_pools import configure_engines, init_replicas, use_pool, use_replica, IMPORT_POOL
+from webhook_delivery import (
+    WebhookEvent, build_headers, delivery_target, get_delivery_backend,
+    invalidate_subscribers, matching_targets, serialize_payload
+)
 
-def create_app():
+def create_app(config_object=Config):
+    """Build the Flask app without touching the database.
+
+    Schema setup lives in migrate.py, so worker boots stay cheap no matter
+    how slow the database is. Startup time is recorded in STARTUP_TIME_MS.
+    """
+    started = time.perf_counter()
+    
     app = Flask(__name__)
-    app.config.from_object(Config)
+    app.config.from_object(config_object)
     
-    # Initialize extensions with engine options
-    db.init_app(app)
+    apply_ipv6_workaround()
     
-    # Simple database initialization without Redis dependency
+    # Initialize extensions with engine options (engines connect lazily)
+    db.init_app(app)
     with app.app_context():
-        try:
-            # Test database connection with retry
-            max_retries = 3
-            for attempt in range(max_retries):
-                try:
-                    db.create_all()
-                    print("Database tables created successfully")
-                    break
-                except Exception as e:
-                    if attempt < max_retries - 1:
-                        print(f"Database connection attempt {attempt + 1} failed, retrying...")
-                        import time
-                        time.sleep(2)
-                    else:
-                        print(f"Database initialization error: {e}")
-                        # Continue anyway for local development
-        except Exception as e:
-            print(f"Database initialization error: {e}")
+        configure_engines(app, db.engines)
+        init_replicas(app, db.engines)
     
     CORS(app)
     
+    # Render and compress the dashboard once instead of on every page load
+    app.extensions['dashboard'] = DashboardAssets(app)
+    
     # Create upload folder
     os.makedirs(app.config.get('UPLOAD_FOLDER', 'uploads'), exist_ok=True)
     
+    startup_ms = round((time.perf_counter() - started) * 1000, 2)
+    app.config['STARTUP_TIME_MS'] = startup_ms
+    if startup_ms > app.config.get('STARTUP_BUDGET_MS', 300):
+        print(f"⚠️ App startup took {startup_ms} ms, over the {app.config['STARTUP_BUDGET_MS']} ms budget")
+    
     return app
 
 app = create_app()
 
+# Clients that just wrote carry this cookie (or send X-Read-Consistency: primary)
+# so their next reads see their own writes instead of a lagging replica
+PRIMARY_COOKIE = 'db_primary_until'
+
+def wrote_recently():
+    if request.headers.get('X-Read-Consistency', '').lower() == 'primary':
+        return True
+    try:
+        return float(request.cookies.get(PRIMARY_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+def read_only_route(view):
+    """Serve a read-only route from a replica unless the client wrote recently"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not wrote_recently():
+            use_replica(db.session)
+        return view(*args, **kwargs)
+    return wrapper
+
+@app.after_request
+def stick_writers_to_primary(response):
+    if (
+        'replica_router' in app.extensions
+        and request.method not in ('GET', 'HEAD', 'OPTIONS')
+        and response.status_code < 400
+    ):
+        sticky = app.config.get('REPLICA_STICKY_SECONDS', 5)
+        response.set_cookie(
+            PRIMARY_COOKIE,
+            str(time.time() + sticky),
+            max_age=max(int(sticky), 1),
+            httponly=True,
+            samesite='Lax'
+        )
+    return response
+
+@app.after_request
+def compress_and_cache(response):
+    """Revalidatable ETags on JSON GETs, then negotiated gzip/brotli compression"""
+    if (
+        request.method == 'GET'
+        and response.status_code == 200
+        and response.mimetype == 'application/json'
+        and not response.is_streamed
+    ):
+        # Clients (and proxies) may keep the body but must revalidate; an
+        # unchanged list costs a 304 instead of the full payload
+        response.headers.setdefault('Cache-Control', 'no-cache')
+        response.add_etag(weak=True)
+        response.make_conditional(request)
+    
+    if app.config.get('RESPONSE_COMPRESSION', True):
+        compress_response(response, request.accept_encodings, app.config.get('COMPRESS_MIN_BYTES', 1024))
+    return response
+
 def trigger_webhooks(event_type, product_data):
-    """Trigger all active webhooks for a given event type"""
+    """Trigger all active webhooks for a given event type.
+
+    product_data may be a Product instance; it is only converted with
+    to_dict() when at least one webhook is subscribed to the event.
+    """
     try:
-        with app.app_context():
-            # Find all active webhooks that listen to this event type
-            active_webhooks = Webhook.query.filter(
-                Webhook.active == True
-            ).all()
-            
-            # Filter webhooks that contain the event type in their event_types JSON array
-            matching_webhooks = []
-            for webhook in active_webhooks:
-                if webhook.event_types and event_type in webhook.event_types:
-                    matching_webhooks.append(webhook)
-            
-            if not matching_webhooks:
-                return
-            
-            # Prepare webhook payload
-            payload = {
-                'event_type': event_type,
-                'timestamp': datetime.utcnow().isoformat(),
-                'data': product_data
-            }
-            
-            # Send webhooks asynchronously to avoid blocking the main request
-            def send_webhook(webhook, payload):
-                try:
-                    headers = {'Content-Type': 'application/json'}
-                    if webhook.headers:
-                        headers.update(webhook.headers)
-                    
-                    # Add secret as header if present
-                    if webhook.secret:
-                        headers['X-Webhook-Secret'] = webhook.secret
-                    
-                    response = requests.post(
-                        webhook.url,
-                        json=payload,
-                        headers=headers,
-                        timeout=10
-                    )
-                    
-                    # Update webhook with success info
-                    with app.app_context():
-                        webhook.last_triggered = datetime.utcnow()
-                        webhook.last_response_code = response.status_code
-                        webhook.last_error = None
-                        try:
-                            db.session.commit()
-                        except:
-                            db.session.rollback()
-                    
-                except Exception as e:
-                    # Update webhook with error info
-                    with app.app_context():
-                        webhook.last_triggered = datetime.utcnow()
-                        webhook.last_response_code = None
-                        webhook.last_error = str(e)
-                        try:
-                            db.session.commit()
-                        except:
-                            db.session.rollback()
-            
-            # Send webhooks in separate threads
-            for webhook in matching_webhooks:
-                thread = threading.Thread(target=send_webhook, args=(webhook, payload))
-                thread.daemon = True
-                thread.start()
+        targets = matching_targets(app, event_type)
+        if not targets:
+            return
+        
+        if hasattr(product_data, 'to_dict'):
+            product_data = product_data.to_dict()
+        
+        # Hand off to the delivery backend so the request isn't blocked
+        get_delivery_backend(app).submit(targets, WebhookEvent(event_type, product_data))
                 
     except Exception as e:
         print(f"Error triggering webhooks: {e}")
 
 @app.route('/')
 def index():
-    return render_template('index.html')
+    return app.extensions['dashboard'].page_response(request)
+
+@app.route('/assets/<filename>')
+def dashboard_asset(filename):
+    return app.extensions['dashboard'].asset_response(request, filename)
 
 @app.route('/api/products', methods=['GET'])
+@read_only_route
 def get_products():
     try:
         page = int(request.args.get('page', 1))
@@ -163,6 +182,75 @@ def get_products():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/products/changes', methods=['GET'])
+@read_only_route
+def get_product_changes():
+    """Changes after the `since` cursor: upserts and delete tombstones, oldest first.
+
+    `wait=<seconds>` long-polls until a change arrives; `Accept: text/event-stream`
+    (or `stream=1`) streams changes as Server-Sent Events, resuming from Last-Event-ID.
+    """
+    try:
+        cursor = int(request.args.get('since') or request.headers.get('Last-Event-ID') or 0)
+        limit = min(int(request.args.get('limit', 500)), 1000)
+        wait = float(request.args.get('wait', 0))
+    except ValueError:
+        return jsonify({'error': 'since, limit and wait must be numbers'}), 400
+    if not math.isfinite(wait):
+        # nan would never reach the deadline and poll the database in a tight loop
+        return jsonify({'error': 'wait must be a finite number of seconds'}), 400
+    wait = max(0.0, min(wait, app.config['CHANGE_FEED_MAX_WAIT_SECONDS']))
+    if limit < 1:
+        # limit=0 would answer has_more=true forever without advancing the cursor
+        return jsonify({'error': 'limit must be between 1 and 1000'}), 400
+    
+    if request.args.get('stream') == '1' or request.accept_mimetypes.best == 'text/event-stream':
+        return Response(
+            stream_with_context(stream_product_changes(cursor, limit)),
+            mimetype='text/event-stream',
+            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+        )
+    
+    try:
+        deadline = time.monotonic() + wait
+        while True:
+            changes, has_more = changes_since(cursor, limit)
+            remaining = deadline - time.monotonic()
+            if changes or remaining <= 0:
+                break
+            # End the read transaction and free the connection while waiting
+            db.session.close()
+            wait_for_changes(min(remaining, app.config['CHANGE_FEED_POLL_SECONDS']))
+        
+        return jsonify({
+            'changes': changes,
+            'next_cursor': changes[-1]['change_seq'] if changes else cursor,
+            'has_more': has_more
+        })
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def stream_product_changes(cursor, limit):
+    """SSE generator; ends after CHANGE_FEED_STREAM_SECONDS and the client reconnects"""
+    deadline = time.monotonic() + app.config['CHANGE_FEED_STREAM_SECONDS']
+    last_sent = time.monotonic()
+    yield 'retry: 1000\n\n'
+    while time.monotonic() < deadline:
+        changes, has_more = changes_since(cursor, limit)
+        db.session.close()
+        if changes:
+            cursor = changes[-1]['change_seq']
+            data = json.dumps({'changes': changes, 'next_cursor': cursor, 'has_more': has_more})
+            yield f'id: {cursor}\nevent: changes\ndata: {data}\n\n'
+            last_sent = time.monotonic()
+            if has_more:
+                continue
+        elif time.monotonic() - last_sent >= 15:
+            yield ': keep-alive\n\n'
+            last_sent = time.monotonic()
+        wait_for_changes(app.config['CHANGE_FEED_POLL_SECONDS'])
+
 @app.route('/api/products', methods=['POST'])
 def create_product():
     try:
@@ -186,7 +274,7 @@ def create_product():
         db.session.commit()
         
         # Trigger webhooks for product creation
-        trigger_webhooks('product.created', product.to_dict())
+        trigger_webhooks('product.created', product)
         
         return jsonify({
             'message': 'Product created successfully',
@@ -226,7 +314,7 @@ def update_product(product_id):
         db.session.commit()
         
         # Trigger webhooks for product update
-        trigger_webhooks('product.updated', product.to_dict())
+        trigger_webhooks('product.updated', product)
         
         return jsonify({
             'message': 'Product updated successfully',
@@ -256,17 +344,19 @@ def delete_product(product_id):
 @app.route('/api/products/bulk-delete', methods=['DELETE'])
 def bulk_delete_products():
     try:
-        # Get all products before deletion for webhook triggering
-        products = Product.query.all()
-        deleted_count = len(products)
-        
-        # Trigger webhooks for each deleted product
-        for product in products:
-            trigger_webhooks('product.deleted', product.to_dict())
+        # Only load the rows when someone is subscribed to deletions
+        deleted_products = []
+        if matching_targets(app, 'product.deleted'):
+            deleted_products = [product.to_dict() for product in Product.query.all()]
         
-        Product.query.delete()
+        # Set-based delete that leaves a tombstone per row for the change feed
+        deleted_count = delete_all_products(db.session)
         db.session.commit()
         
+        # Trigger webhooks for each deleted product
+        for product_data in deleted_products:
+            trigger_webhooks('product.deleted', product_data)
+        
         return jsonify({
             'message': f'Successfully deleted {deleted_count} products',
             'deleted_count': deleted_count
@@ -276,6 +366,36 @@ def bulk_delete_products():
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+def import_products(binary_stream, filename, upload_id):
+    """Stream CSV rows from an uploaded (possibly compressed) file into the products table.
+
+    Rejected rows are written to the upload's error report, served by
+    GET /api/uploads/<upload_id>/errors.
+    """
+    # Keep the import off the interactive request pool
+    use_pool(db.session, IMPORT_POOL)
+    
+    # Simple CSV processing - only name, sku, description
+    csv_reader = open_csv_rows(binary_stream, filename)
+    importer = ProductImporter(
+        db.session,
+        notify=trigger_webhooks,
+        subscribed=lambda event_type: bool(matching_targets(app, event_type)),
+        batch_size=app.config.get('IMPORT_BATCH_SIZE', 500),
+        use_copy=app.config.get('IMPORT_USE_COPY', True),
+        copy_chunk_rows=app.config.get('IMPORT_COPY_CHUNK_ROWS', 50000),
+        use_sku_index=app.config.get('IMPORT_SKU_INDEX', True),
+        sku_index_min_rows=app.config.get('IMPORT_SKU_INDEX_MIN_ROWS', 5000),
+        error_path=error_report_path(app.config.get('UPLOAD_FOLDER', 'uploads'), upload_id)
+    )
+    return importer.run(csv_reader)
+
+def import_result(upload_id, report):
+    result = {'message': 'Upload completed', 'upload_id': upload_id, **report.to_dict()}
+    if report.has_error_report:
+        result['error_report_url'] = f'/api/uploads/{upload_id}/errors'
+    return result
+
 @app.route('/upload', methods=['POST'])
 def upload_file():
     if 'file' not in request.files:
@@ -285,90 +405,128 @@ def upload_file():
     if file.filename == '':
         return jsonify({'error': 'No file selected'}), 400
     
-    if not file.filename.lower().endswith('.csv'):
-        return jsonify({'error': 'Only CSV files are allowed'}), 400
+    try:
+        csv_compression(file.filename)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
     try:
-        # Simple CSV processing - only name, sku, description
-        processed_count = 0
-        error_count = 0
-        updated_count = 0
-        errors = []
-        
-        # Read CSV
-        content = file.stream.read().decode('utf-8')
-        csv_reader = csv.DictReader(content.splitlines())
-        
-        for i, row in enumerate(csv_reader, 1):
-            try:
-                # Check required fields
-                if not row.get('name') or not row.get('sku'):
-                    errors.append(f"Row {i+1}: Missing name or SKU")
-                    error_count += 1
-                    continue
-                
-                # Check for existing product (case-insensitive SKU)
-                existing = Product.query.filter(
-                    db.func.lower(Product.sku) == db.func.lower(row['sku'].strip())
-                ).first()
-                
-                if existing:
-                    # Update existing
-                    existing.name = row['name'].strip()
-                    existing.description = row.get('description', '').strip()
-                    existing.updated_at = datetime.utcnow()
-                    updated_count += 1
-                    
-                    # Trigger webhook for updated product
-                    try:
-                        trigger_webhooks('product.updated', existing.to_dict())
-                    except:
-                        pass  # Don't fail upload if webhook fails
-                else:
-                    # Create new
-                    product = Product(
-                        name=row['name'].strip(),
-                        sku=row['sku'].strip(),
-                        description=row.get('description', '').strip()
-                    )
-                    db.session.add(product)
-                    
-                    # Trigger webhook for created product (will trigger after commit)
-                    try:
-                        db.session.flush()  # Ensure product has an ID
-                        trigger_webhooks('product.created', product.to_dict())
-                    except:
-                        pass  # Don't fail upload if webhook fails
-                
-                processed_count += 1
-                
-                # Commit every 50 records
-                if processed_count % 50 == 0:
-                    db.session.commit()
-                    
-            except Exception as e:
-                error_count += 1
-                errors.append(f"Row {i+1}: {str(e)}")
-                continue
-        
-        # Final commit
-        db.session.commit()
+        upload_folder = app.config.get('UPLOAD_FOLDER', 'uploads')
+        prune_stale_uploads(upload_folder, app.config.get('UPLOAD_SPOOL_TTL_SECONDS', 86400))
+        upload_id = new_upload_id()
+        report = import_products(file.stream, file.filename, upload_id)
+        return jsonify(import_result(upload_id, report))
         
-        return jsonify({
-            'message': 'Upload completed',
-            'processed_count': processed_count,
-            'error_count': error_count,
-            'updated_count': updated_count,
-            'errors': errors[:5]  # First 5 errors only
-        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def upload_error(e):
+    return jsonify({'error': str(e), **e.details}), e.status_code
+
+@app.route('/api/uploads', methods=['POST'])
+def create_upload():
+    try:
+        data = request.get_json() or {}
+        filename = data.get('filename') or ''
+        try:
+            csv_compression(filename)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        upload_folder = app.config.get('UPLOAD_FOLDER', 'uploads')
+        prune_stale_uploads(upload_folder, app.config.get('UPLOAD_SPOOL_TTL_SECONDS', 86400))
+        upload = ChunkedUpload.create(
+            upload_folder,
+            filename,
+            data.get('size'),
+            chunk_size=data.get('chunk_size') or app.config.get('UPLOAD_CHUNK_SIZE'),
+            sha256=data.get('sha256'),
+            max_size=app.config.get('MAX_CONTENT_LENGTH')
+        )
+        return jsonify(upload.status()), 201
         
+    except UploadError as e:
+        return upload_error(e)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
+
+@app.route('/api/uploads/<upload_id>', methods=['GET'])
+def get_upload(upload_id):
+    try:
+        upload = ChunkedUpload.load(app.config.get('UPLOAD_FOLDER', 'uploads'), upload_id)
+        return jsonify(upload.status())
+    except UploadError as e:
+        return upload_error(e)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/uploads/<upload_id>', methods=['PUT'])
+def put_upload_chunk(upload_id):
+    try:
+        upload = ChunkedUpload.load(app.config.get('UPLOAD_FOLDER', 'uploads'), upload_id)
+        offset = request.args.get('offset', type=int)
+        if offset is None:
+            return jsonify({'error': 'offset query parameter is required'}), 400
+        
+        received = upload.write_chunk(offset, request.stream, request.headers.get('X-Chunk-SHA256'))
+        return jsonify({'offset': offset, 'received': received, **upload.status()})
         
+    except UploadError as e:
+        return upload_error(e)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/uploads/<upload_id>/complete', methods=['POST'])
+def complete_upload(upload_id):
+    try:
+        upload = ChunkedUpload.load(app.config.get('UPLOAD_FOLDER', 'uploads'), upload_id)
+        upload.begin_complete()
+    except UploadError as e:
+        return upload_error(e)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+    
+    try:
+        with upload.open_binary() as data:
+            report = import_products(data, upload.meta['filename'], upload_id)
+    except Exception as e:
+        # Leave the spooled file in place so the import can be retried
+        upload.abort_complete()
+        return jsonify({'error': str(e)}), 500
+    
+    upload.discard()
+    return jsonify(import_result(upload_id, report))
+
+@app.route('/api/uploads/<upload_id>/errors', methods=['GET'])
+def get_upload_errors(upload_id):
+    try:
+        path = error_report_path(app.config.get('UPLOAD_FOLDER', 'uploads'), upload_id)
+        if not os.path.isfile(path):
+            return jsonify({'error': 'No error report for this upload'}), 404
+        # Streamed from disk in blocks, however many rows were rejected
+        return send_file(
+            os.path.abspath(path),
+            mimetype='text/csv',
+            as_attachment=True,
+            download_name=f'import-errors-{upload_id}.csv'
+        )
+    except UploadError as e:
+        return upload_error(e)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/uploads/<upload_id>', methods=['DELETE'])
+def delete_upload(upload_id):
+    try:
+        ChunkedUpload.load(app.config.get('UPLOAD_FOLDER', 'uploads'), upload_id).discard()
+        return jsonify({'message': 'Upload discarded'})
+    except UploadError as e:
+        return upload_error(e)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/webhooks', methods=['GET'])
+@read_only_route
 def get_webhooks():
     try:
         webhooks = Webhook.query.all()
@@ -378,6 +536,16 @@ def get_webhooks():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def webhook_limit_error(data):
+    """Validation message for the rate limit/concurrency fields, or None"""
+    rate = data.get('rate_limit_per_second')
+    if rate is not None and (isinstance(rate, bool) or not isinstance(rate, (int, float)) or rate <= 0):
+        return 'rate_limit_per_second must be a positive number'
+    concurrency = data.get('max_concurrency')
+    if concurrency is not None and (isinstance(concurrency, bool) or not isinstance(concurrency, int) or concurrency < 1):
+        return 'max_concurrency must be a positive integer'
+    return None
+
 @app.route('/api/webhooks', methods=['POST'])
 def create_webhook():
     try:
@@ -386,17 +554,26 @@ def create_webhook():
         if not data or not data.get('name') or not data.get('url'):
             return jsonify({'error': 'Name and URL are required'}), 400
         
+        limit_error = webhook_limit_error(data)
+        if limit_error:
+            return jsonify({'error': limit_error}), 400
+        
         webhook = Webhook(
             name=data['name'],
             url=data['url'],
             event_types=data.get('event_types', []),
             active=data.get('active', True),
             secret=data.get('secret', ''),
-            headers=data.get('headers', {})
+            headers=data.get('headers', {}),
+            accepts_gzip=data.get('accepts_gzip', False),
+            rate_limit_per_second=data.get('rate_limit_per_second'),
+            max_concurrency=data.get('max_concurrency'),
+            adaptive_concurrency=data.get('adaptive_concurrency', False)
         )
         
         db.session.add(webhook)
         db.session.commit()
+        invalidate_subscribers()
         
         return jsonify({
             'message': 'Webhook created successfully',
@@ -415,6 +592,10 @@ def update_webhook(webhook_id):
         if not data:
             return jsonify({'error': 'No data provided'}), 400
         
+        limit_error = webhook_limit_error(data)
+        if limit_error:
+            return jsonify({'error': limit_error}), 400
+        
         if 'name' in data:
             webhook.name = data['name']
         if 'url' in data:
@@ -427,9 +608,18 @@ def update_webhook(webhook_id):
             webhook.secret = data['secret']
         if 'headers' in data:
             webhook.headers = data['headers']
+        if 'accepts_gzip' in data:
+            webhook.accepts_gzip = data['accepts_gzip']
+        if 'rate_limit_per_second' in data:
+            webhook.rate_limit_per_second = data['rate_limit_per_second']
+        if 'max_concurrency' in data:
+            webhook.max_concurrency = data['max_concurrency']
+        if 'adaptive_concurrency' in data:
+            webhook.adaptive_concurrency = data['adaptive_concurrency']
         
         webhook.updated_at = datetime.utcnow()
         db.session.commit()
+        invalidate_subscribers()
         
         return jsonify({
             'message': 'Webhook updated successfully',
@@ -445,6 +635,7 @@ def delete_webhook(webhook_id):
         webhook = Webhook.query.get_or_404(webhook_id)
         db.session.delete(webhook)
         db.session.commit()
+        invalidate_subscribers()
         
         return jsonify({'message': 'Webhook deleted successfully'})
         
@@ -470,15 +661,12 @@ def test_webhook(webhook_id):
         
         start_time = time.time()
         
-        # Send test request
-        headers = {'Content-Type': 'application/json'}
-        if webhook.headers:
-            headers.update(webhook.headers)
-        
+        # Send test request, signed the same way as real deliveries
+        body = serialize_payload(test_payload)
         response = requests.post(
             webhook.url,
-            json=test_payload,
-            headers=headers,
+            data=body,
+            headers=build_headers(delivery_target(webhook), body),
             timeout=30
         )
         
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Server profile benchmark
+Starts gunicorn (gunicorn.conf.py) with each worker profile and measures
+how /api/products holds up while other clients are stuck on a slow request:
+a webhook test against a receiver that takes SLOW_SECONDS to answer, the way
+a slow subscriber or a large upload ties up a worker.
+
+    python migrate.py
+    python bench_server.py                   # sync, gthread and gevent (if installed)
+    python bench_server.py sync gthread      # selected profiles
+"""
+import importlib.util
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import requests
+
+WORKERS = 2
+DURATION_SECONDS = 10
+SLOW_SECONDS = 2
+SLOW_CLIENTS = 4
+FAST_CLIENTS = 8
+
+class SlowReceiver(BaseHTTPRequestHandler):
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        time.sleep(SLOW_SECONDS)
+        self.send_response(200)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def start_receiver():
+    server = ThreadingHTTPServer(('127.0.0.1', free_port()), SlowReceiver)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f'http://127.0.0.1:{server.server_address[1]}/hook'
+
+def start_server(profile, port):
+    env = dict(
+        os.environ,
+        PORT=str(port),
+        WEB_CONCURRENCY=str(WORKERS),
+        GUNICORN_WORKER_CLASS=profile,
+        GUNICORN_LOG_LEVEL='warning',
+    )
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'app:app'],
+        env=env,
+        cwd=os.path.dirname(os.path.abspath(__file__))
+    )
+    base = f'http://127.0.0.1:{port}'
+    for _ in range(100):
+        try:
+            requests.get(f'{base}/api/products', timeout=1)
+            return server, base
+        except requests.RequestException:
+            time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError(f'gunicorn ({profile}) did not start')
+
+def run_clients(base, webhook_id):
+    stop = time.monotonic() + DURATION_SECONDS
+    fast_latencies = []
+    slow_done = [0]
+    errors = [0]
+    lock = threading.Lock()
+
+    def fast_client():
+        session = requests.Session()
+        while time.monotonic() < stop:
+            started = time.perf_counter()
+            try:
+                session.get(f'{base}/api/products?per_page=20', timeout=30).raise_for_status()
+            except requests.RequestException:
+                with lock:
+                    errors[0] += 1
+                continue
+            with lock:
+                fast_latencies.append((time.perf_counter() - started) * 1000)
+
+    def slow_client():
+        session = requests.Session()
+        while time.monotonic() < stop:
+            try:
+                session.post(f'{base}/api/webhooks/{webhook_id}/test', timeout=60)
+                with lock:
+                    slow_done[0] += 1
+            except requests.RequestException:
+                with lock:
+                    errors[0] += 1
+
+    clients = [threading.Thread(target=slow_client) for _ in range(SLOW_CLIENTS)]
+    clients += [threading.Thread(target=fast_client) for _ in range(FAST_CLIENTS)]
+    for client in clients:
+        client.start()
+    for client in clients:
+        client.join()
+    return sorted(fast_latencies), slow_done[0], errors[0]
+
+def percentile(values, fraction):
+    if not values:
+        return float('nan')
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+def bench(profile, receiver_url):
+    server, base = start_server(profile, free_port())
+    try:
+        webhook = requests.post(f'{base}/api/webhooks', json={
+            'name': f'bench-{profile}',
+            'url': receiver_url,
+            'event_types': [],
+        }).json()['webhook']
+        try:
+            latencies, slow_done, errors = run_clients(base, webhook['id'])
+        finally:
+            requests.delete(f"{base}/api/webhooks/{webhook['id']}")
+    finally:
+        server.terminate()
+        server.wait()
+
+    print(
+        f"{profile:<8} {len(latencies) / DURATION_SECONDS:>9.1f} "
+        f"{percentile(latencies, 0.5):>9.1f} {percentile(latencies, 0.95):>9.1f} "
+        f"{slow_done:>10} {errors:>7}"
+    )
+
+def main(argv):
+    profiles = argv[1:] or ['sync', 'gthread', 'gevent']
+    if 'gevent' in profiles:
+        if importlib.util.find_spec('gevent') is None:
+            print("gevent is not installed, skipping the gevent profile")
+            profiles.remove('gevent')
+
+    receiver_url = start_receiver()
+    print(f"{WORKERS} workers, {FAST_CLIENTS} clients on GET /api/products, "
+          f"{SLOW_CLIENTS} on a {SLOW_SECONDS}s webhook test, {DURATION_SECONDS}s per profile")
+    print(f"{'profile':<8} {'fast rps':>9} {'p50 ms':>9} {'p95 ms':>9} {'slow done':>10} {'errors':>7}")
+    for profile in profiles:
+        bench(profile, receiver_url)
+
+if __name__ == '__main__':
+    main(sys.argv)
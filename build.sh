@@ -17,4 +17,7 @@ python -c "import psycopg2; print('✅ psycopg2 imported successfully')"
 echo "=== Testing IPv4 database connection ==="
 python test_db_ipv4.py
 
+echo "=== Applying database migrations ==="
+python migrate.py
+
 echo "=== Build completed ==="
\ No newline at end of file
@@ -0,0 +1,118 @@
+"""
+Product change feed
+Every product write gets the next value of a single change counter and
+every delete leaves a tombstone, so clients can sync incrementally with
+GET /api/products/changes?since=<cursor> instead of re-reading the table.
+
+The counter row is incremented inside the writing transaction and stays
+locked until it commits, so change_seq order matches commit order and a
+reader never sees seq N+1 before seq N is visible.
+"""
+import os
+import threading
+from datetime import datetime
+from sqlalchemy import event, func, select, text
+from models import db, Product, ProductTombstone, ChangeCounter, product_content_hash
+
+COUNTER_NAME = 'products'
+
+# Wakes long-poll and SSE waiters in this process as soon as a product
+# change commits; other processes' changes are picked up by polling
+_changed = threading.Condition()
+
+def _reset_after_fork():
+    # A forked worker must not inherit the lock in whatever state the parent held it
+    global _changed
+    _changed = threading.Condition()
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+def allocate_change_seqs(conn, count):
+    """Reserve count consecutive change_seq values and return the first one"""
+    table = ChangeCounter.__table__
+    result = conn.execute(
+        table.update()
+        .where(table.c.name == COUNTER_NAME)
+        .values(value=table.c.value + count)
+    )
+    if result.rowcount == 0:
+        conn.execute(table.insert().values(name=COUNTER_NAME, value=count))
+    last = conn.execute(select(table.c.value).where(table.c.name == COUNTER_NAME)).scalar()
+    return last - count + 1
+
+@event.listens_for(db.session, 'before_flush')
+def stamp_product_changes(session, flush_context, instances):
+    """Assign change_seq (and refresh content_hash) for every product write"""
+    changed = [obj for obj in session.new if isinstance(obj, Product)]
+    changed += [
+        obj for obj in session.dirty
+        if isinstance(obj, Product) and session.is_modified(obj, include_collections=False)
+    ]
+    deleted = [obj for obj in session.deleted if isinstance(obj, Product)]
+    if not changed and not deleted:
+        return
+
+    seq = allocate_change_seqs(session.connection(), len(changed) + len(deleted))
+    for product in changed:
+        product.change_seq = seq
+        product.content_hash = product_content_hash(product.name, product.description)
+        seq += 1
+    for product in deleted:
+        session.add(ProductTombstone(product_id=product.id, sku=product.sku, change_seq=seq))
+        seq += 1
+    session.info['product_changes'] = True
+
+@event.listens_for(db.session, 'after_commit')
+def notify_change_waiters(session):
+    if session.info.pop('product_changes', False):
+        with _changed:
+            _changed.notify_all()
+
+def delete_all_products(session):
+    """Delete every product, leaving one tombstone per row; returns the count"""
+    conn = session.connection()
+    # Take the counter lock first so no product write can slip in between
+    # counting the rows and tombstoning them
+    conn.execute(
+        select(ChangeCounter.__table__.c.value)
+        .where(ChangeCounter.__table__.c.name == COUNTER_NAME)
+        .with_for_update()
+    )
+    count = conn.execute(select(func.count()).select_from(Product.__table__)).scalar()
+    if count:
+        first = allocate_change_seqs(conn, count)
+        conn.execute(
+            text(
+                "INSERT INTO product_tombstones (product_id, sku, change_seq, deleted_at) "
+                "SELECT id, sku, :first + ROW_NUMBER() OVER (ORDER BY id) - 1, :now FROM products"
+            ),
+            {'first': first, 'now': datetime.utcnow()}
+        )
+        conn.execute(Product.__table__.delete())
+        session.info['product_changes'] = True
+    return count
+
+def changes_since(cursor, limit):
+    """Up to limit changes after cursor, oldest first, and whether more remain"""
+    products = (
+        Product.query.filter(Product.change_seq > cursor)
+        .order_by(Product.change_seq).limit(limit + 1).all()
+    )
+    tombstones = (
+        ProductTombstone.query.filter(ProductTombstone.change_seq > cursor)
+        .order_by(ProductTombstone.change_seq).limit(limit + 1).all()
+    )
+    changes = [
+        {'change_seq': product.change_seq, 'op': 'upsert', 'product': product.to_dict()}
+        for product in products
+    ] + [
+        {'change_seq': tombstone.change_seq, 'op': 'delete', 'product': tombstone.to_dict()}
+        for tombstone in tombstones
+    ]
+    changes.sort(key=lambda change: change['change_seq'])
+    return changes[:limit], len(changes) > limit
+
+def wait_for_changes(timeout):
+    """Block until a local product change commits or timeout seconds pass"""
+    with _changed:
+        _changed.wait(timeout)
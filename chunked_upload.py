@@ -0,0 +1,234 @@
+"""
+Chunked, resumable CSV uploads
+Large files are sent as fixed-size chunks instead of one multipart POST:
+
+    POST   /api/uploads                    {filename, size, chunk_size?, sha256?}
+    PUT    /api/uploads/<id>?offset=<n>    raw chunk bytes (X-Chunk-SHA256: <hex>)
+    GET    /api/uploads/<id>               next_offset and missing_offsets to resume from
+    POST   /api/uploads/<id>/complete      verify the file and import it
+    DELETE /api/uploads/<id>               abandon the upload
+    GET    /api/uploads/<id>/errors        CSV of every row the import rejected
+
+Each chunk is written at its offset into a spool file under UPLOAD_FOLDER
+and acknowledged with a marker file once it is verified and on disk. All
+state lives in the spool directory, so any worker on the host can accept any
+chunk, chunks may arrive in parallel and out of order, and resending a chunk
+simply overwrites it.
+
+Row errors found while importing are written to UPLOAD_FOLDER/import_errors/
+<id>.csv (plain /upload imports get an id too), which outlives the spool and
+is pruned with it after UPLOAD_SPOOL_TTL_SECONDS.
+"""
+import hashlib
+import json
+import os
+import re
+import shutil
+import time
+import uuid
+
+SPOOL_DIR = 'chunked'
+ERROR_REPORT_DIR = 'import_errors'
+DEFAULT_CHUNK_SIZE = 8 * 1024 * 1024
+MIN_CHUNK_SIZE = 256 * 1024
+COPY_BUFFER_SIZE = 64 * 1024
+
+_UPLOAD_ID = re.compile(r'^[0-9a-f]{32}$')
+
+class UploadError(Exception):
+    """A client error in the upload protocol, reported with status_code"""
+
+    def __init__(self, message, status_code=400, **details):
+        super().__init__(message)
+        self.status_code = status_code
+        self.details = details
+
+def spool_root(upload_folder):
+    return os.path.join(upload_folder, SPOOL_DIR)
+
+def new_upload_id():
+    return uuid.uuid4().hex
+
+def error_report_path(upload_folder, upload_id):
+    """Where the import error report of an upload is (or will be) written"""
+    if not _UPLOAD_ID.match(upload_id or ''):
+        raise UploadError('Upload not found', 404)
+    return os.path.join(upload_folder, ERROR_REPORT_DIR, f'{upload_id}.csv')
+
+def prune_stale_uploads(upload_folder, max_age_seconds):
+    """Remove spool directories and error reports older than max_age_seconds"""
+    removed = 0
+    cutoff = time.time() - max_age_seconds
+    for root in (spool_root(upload_folder), os.path.join(upload_folder, ERROR_REPORT_DIR)):
+        if not os.path.isdir(root):
+            continue
+        for name in os.listdir(root):
+            path = os.path.join(root, name)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    if os.path.isdir(path):
+                        shutil.rmtree(path, ignore_errors=True)
+                    else:
+                        os.remove(path)
+                    removed += 1
+            except OSError:
+                pass  # Completed or removed by another worker meanwhile
+    return removed
+
+class ChunkedUpload:
+    """One upload's spool directory: meta.json, the data file and chunk markers"""
+
+    def __init__(self, upload_folder, upload_id, meta):
+        self.upload_id = upload_id
+        self.meta = meta
+        self.path = os.path.join(spool_root(upload_folder), upload_id)
+        self.data_path = os.path.join(self.path, 'data')
+        self.chunks_path = os.path.join(self.path, 'chunks')
+
+    @classmethod
+    def create(cls, upload_folder, filename, size, chunk_size=None, sha256=None, max_size=None):
+        if not isinstance(size, int) or size <= 0:
+            raise UploadError('size must be a positive number of bytes')
+        if max_size and size > max_size:
+            raise UploadError(f'File too large (max {max_size} bytes)', 413)
+        chunk_size = chunk_size or DEFAULT_CHUNK_SIZE
+        if not isinstance(chunk_size, int) or chunk_size < MIN_CHUNK_SIZE:
+            raise UploadError(f'chunk_size must be at least {MIN_CHUNK_SIZE} bytes')
+        if sha256 is not None and not re.match(r'^[0-9a-fA-F]{64}$', sha256):
+            raise UploadError('sha256 must be a hex SHA-256 digest')
+
+        upload_id = new_upload_id()
+        meta = {
+            'filename': os.path.basename(filename),
+            'size': size,
+            'chunk_size': chunk_size,
+            'sha256': sha256.lower() if sha256 else None,
+            'created_at': time.time(),
+        }
+        upload = cls(upload_folder, upload_id, meta)
+        os.makedirs(upload.chunks_path)
+        # Sparse file of the final size; chunks are written in place
+        with open(upload.data_path, 'wb') as data:
+            data.truncate(size)
+        meta_tmp = os.path.join(upload.path, 'meta.json.tmp')
+        with open(meta_tmp, 'w') as f:
+            json.dump(meta, f)
+        os.replace(meta_tmp, os.path.join(upload.path, 'meta.json'))
+        return upload
+
+    @classmethod
+    def load(cls, upload_folder, upload_id):
+        if not _UPLOAD_ID.match(upload_id or ''):
+            raise UploadError('Upload not found', 404)
+        try:
+            with open(os.path.join(spool_root(upload_folder), upload_id, 'meta.json')) as f:
+                meta = json.load(f)
+        except FileNotFoundError:
+            raise UploadError('Upload not found', 404)
+        return cls(upload_folder, upload_id, meta)
+
+    @property
+    def size(self):
+        return self.meta['size']
+
+    @property
+    def chunk_size(self):
+        return self.meta['chunk_size']
+
+    @property
+    def chunk_count(self):
+        return -(-self.size // self.chunk_size)
+
+    def chunk_length(self, index):
+        return min(self.chunk_size, self.size - index * self.chunk_size)
+
+    def write_chunk(self, offset, stream, checksum=None):
+        """Copy one chunk from a binary stream into place and acknowledge it.
+
+        The chunk is read and hashed in COPY_BUFFER_SIZE pieces, so memory
+        stays flat whatever the chunk size. It is only acknowledged when its
+        length (and checksum, if given) match; otherwise the client resends.
+        """
+        if offset < 0 or offset >= self.size or offset % self.chunk_size:
+            raise UploadError(f'offset must be a multiple of {self.chunk_size} below {self.size}')
+        index = offset // self.chunk_size
+        expected = self.chunk_length(index)
+
+        digest = hashlib.sha256()
+        received = 0
+        with open(self.data_path, 'r+b') as data:
+            data.seek(offset)
+            while received <= expected:
+                block = stream.read(min(COPY_BUFFER_SIZE, expected + 1 - received))
+                if not block:
+                    break
+                received += len(block)
+                if received > expected:
+                    break
+                digest.update(block)
+                data.write(block)
+            data.flush()
+            os.fsync(data.fileno())
+
+        if received != expected:
+            raise UploadError(f'Chunk at offset {offset} must be exactly {expected} bytes')
+        if checksum and digest.hexdigest() != checksum.strip().lower():
+            raise UploadError(f'Checksum mismatch for chunk at offset {offset}', 422)
+
+        marker_tmp = os.path.join(self.chunks_path, f'{index}.tmp{uuid.uuid4().hex}')
+        with open(marker_tmp, 'w') as f:
+            f.write(digest.hexdigest())
+        os.replace(marker_tmp, os.path.join(self.chunks_path, str(index)))
+        return received
+
+    def received_chunks(self):
+        return {int(name) for name in os.listdir(self.chunks_path) if name.isdigit()}
+
+    def status(self):
+        received = self.received_chunks()
+        contiguous = 0
+        while contiguous in received:
+            contiguous += 1
+        missing = [index for index in range(self.chunk_count) if index not in received]
+        return {
+            'upload_id': self.upload_id,
+            'filename': self.meta['filename'],
+            'size': self.size,
+            'chunk_size': self.chunk_size,
+            'received_bytes': sum(self.chunk_length(index) for index in received),
+            # Everything before next_offset is acknowledged
+            'next_offset': min(contiguous * self.chunk_size, self.size),
+            'missing_offsets': [index * self.chunk_size for index in missing],
+            'complete': not missing,
+        }
+
+    def begin_complete(self):
+        """Claim the upload for completion; a second concurrent /complete gets a 409"""
+        missing = self.status()['missing_offsets']
+        if missing:
+            raise UploadError('Upload is missing chunks', 409, missing_offsets=missing)
+        try:
+            os.close(os.open(os.path.join(self.path, 'completing'), os.O_CREAT | os.O_EXCL))
+        except FileExistsError:
+            raise UploadError('Upload is already being completed', 409)
+
+        if self.meta.get('sha256'):
+            digest = hashlib.sha256()
+            with open(self.data_path, 'rb') as data:
+                for block in iter(lambda: data.read(1024 * 1024), b''):
+                    digest.update(block)
+            if digest.hexdigest() != self.meta['sha256']:
+                self.abort_complete()
+                raise UploadError('File checksum mismatch', 422)
+
+    def abort_complete(self):
+        try:
+            os.remove(os.path.join(self.path, 'completing'))
+        except FileNotFoundError:
+            pass
+
+    def open_binary(self):
+        return open(self.data_path, 'rb')
+
+    def discard(self):
+        shutil.rmtree(self.path, ignore_errors=True)
@@ -1,7 +1,7 @@
 import os
 from dotenv import load_dotenv
-from urllib.parse import urlparse
-from ipv6_workaround import apply_ipv6_workaround, get_alternative_database_url
+from ipv6_workaround import get_alternative_database_url
+from db_pools import engine_options, pool_binds, replica_binds, statement_timeouts
 
 load_dotenv()
 
@@ -12,41 +12,29 @@ class Config:
     SUPABASE_URL = os.environ.get('SUPABASE_URL')
     SUPABASE_KEY = os.environ.get('SUPABASE_KEY')
     
-    # Apply IPv6 workaround for Render deployment
-    apply_ipv6_workaround()
-    
-    # Database Configuration - Use alternative URL if available
+    # Database Configuration - Use alternative URL if available.
+    # Only environment lookups happen here: nothing at class definition time
+    # may touch the network or print, since every worker imports this module.
     DATABASE_URL = get_alternative_database_url() or os.environ.get('DATABASE_URL')
+    SQLALCHEMY_DATABASE_URI = DATABASE_URL or 'sqlite:///products.db'
     
-    if DATABASE_URL:
-        # Parse the original URL to extract components
-        parsed = urlparse(DATABASE_URL)
-        
-        # Check if this is a Supabase connection that needs IPv4 forcing
-        if 'supabase.co' in DATABASE_URL:
-            print("🔄 Detected Supabase database - using IPv6 workaround connection")
-            
-            # Use the modified URL with additional parameters
-            SQLALCHEMY_DATABASE_URI = DATABASE_URL
-        else:
-            SQLALCHEMY_DATABASE_URI = DATABASE_URL
-    else:
-        SQLALCHEMY_DATABASE_URI = 'sqlite:///products.db'
+    # Connection pools - sizing, pre-ping, statement timeouts and the PgBouncer
+    # transaction-mode profile come from DB_* environment variables (see
+    # db_pools.py). Imports and webhook delivery get their own pools as binds.
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(SQLALCHEMY_DATABASE_URI)
+    SQLALCHEMY_BINDS = pool_binds(SQLALCHEMY_DATABASE_URI)
+    DB_STATEMENT_TIMEOUTS = statement_timeouts()
     
-    # SQLAlchemy configuration for better connection handling
-    SQLALCHEMY_ENGINE_OPTIONS = {
-        'pool_size': 5,
-        'pool_timeout': 20,
-        'pool_recycle': 300,
-        'pool_pre_ping': True,
-        'connect_args': {
-            'connect_timeout': 10,
-            'application_name': 'render_flask_app',
-            # Force IPv4 connection to avoid Render IPv6 routing issues
-            'host': 'db.bhyrldeuwxmtaebjpcmu.supabase.co',
-            'options': '-c default_transaction_isolation=read_committed'
-        }
-    }
+    # Read replicas - comma-separated URLs; list/search routes read from them
+    # while replication lag is under REPLICA_MAX_LAG_SECONDS, and clients stay
+    # on the primary for REPLICA_STICKY_SECONDS after a write
+    DATABASE_REPLICA_URLS = [
+        url.strip() for url in os.environ.get('DATABASE_REPLICA_URLS', '').split(',') if url.strip()
+    ]
+    SQLALCHEMY_BINDS.update(replica_binds(DATABASE_REPLICA_URLS))
+    REPLICA_MAX_LAG_SECONDS = float(os.environ.get('REPLICA_MAX_LAG_SECONDS', 5))
+    REPLICA_LAG_CHECK_SECONDS = float(os.environ.get('REPLICA_LAG_CHECK_SECONDS', 5))
+    REPLICA_STICKY_SECONDS = float(os.environ.get('REPLICA_STICKY_SECONDS', 5))
     
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     
@@ -57,9 +45,49 @@ class Config:
     CELERY_BROKER_URL = REDIS_URL
     CELERY_RESULT_BACKEND = REDIS_URL
     
+    # Webhook Delivery - 'threads' (default) or 'async' (asyncio + aiohttp)
+    WEBHOOK_DELIVERY_BACKEND = os.environ.get('WEBHOOK_DELIVERY_BACKEND', 'threads')
+    WEBHOOK_MAX_IN_FLIGHT = int(os.environ.get('WEBHOOK_MAX_IN_FLIGHT', 1000))
+    WEBHOOK_MAX_CONCURRENCY_PER_WEBHOOK = int(os.environ.get('WEBHOOK_MAX_CONCURRENCY_PER_WEBHOOK', 50))
+    WEBHOOK_MAX_CONNECTIONS_PER_HOST = int(os.environ.get('WEBHOOK_MAX_CONNECTIONS_PER_HOST', 100))
+    # Pending deliveries queued per webhook (per worker); when full, 'coalesce'
+    # replaces a queued event for the same product, otherwise it is dropped
+    WEBHOOK_QUEUE_SIZE = int(os.environ.get('WEBHOOK_QUEUE_SIZE') or os.environ.get('WEBHOOK_MAX_PENDING', 10000))
+    WEBHOOK_QUEUE_OVERFLOW = os.environ.get('WEBHOOK_QUEUE_OVERFLOW', 'coalesce')
+    WEBHOOK_MAX_RETRIES = int(os.environ.get('WEBHOOK_MAX_RETRIES', 2))
+    WEBHOOK_GZIP_MIN_BYTES = int(os.environ.get('WEBHOOK_GZIP_MIN_BYTES', 1024))
+    WEBHOOK_SUBSCRIBER_CACHE_SECONDS = float(os.environ.get('WEBHOOK_SUBSCRIBER_CACHE_SECONDS', 5))
+    # Delivery status/counters are buffered and written this often per worker
+    WEBHOOK_STATUS_FLUSH_SECONDS = float(os.environ.get('WEBHOOK_STATUS_FLUSH_SECONDS', 1))
+    
+    # Change Feed - long-poll cap, poll interval and SSE stream length
+    CHANGE_FEED_MAX_WAIT_SECONDS = float(os.environ.get('CHANGE_FEED_MAX_WAIT_SECONDS', 30))
+    CHANGE_FEED_POLL_SECONDS = float(os.environ.get('CHANGE_FEED_POLL_SECONDS', 1))
+    CHANGE_FEED_STREAM_SECONDS = float(os.environ.get('CHANGE_FEED_STREAM_SECONDS', 300))
+    
+    # Response Compression - gzip/brotli for text responses of at least
+    # COMPRESS_MIN_BYTES; turn off when a proxy in front already compresses
+    RESPONSE_COMPRESSION = os.environ.get('RESPONSE_COMPRESSION', '1').lower() in ('1', 'true', 'yes')
+    COMPRESS_MIN_BYTES = int(os.environ.get('COMPRESS_MIN_BYTES', 1024))
+    
     # Upload Configuration
     MAX_CONTENT_LENGTH = 500 * 1024 * 1024  # 500MB max file size
     UPLOAD_FOLDER = 'uploads'
+    # Chunked uploads (/api/uploads) - default chunk size and how long an
+    # unfinished upload's spool file (or any import's error report) is kept
+    UPLOAD_CHUNK_SIZE = int(os.environ.get('UPLOAD_CHUNK_SIZE', 8 * 1024 * 1024))
+    UPLOAD_SPOOL_TTL_SECONDS = int(os.environ.get('UPLOAD_SPOOL_TTL_SECONDS', 24 * 3600))
+    IMPORT_BATCH_SIZE = int(os.environ.get('IMPORT_BATCH_SIZE', 500))
+    # PostgreSQL: COPY into a staging table and merge, IMPORT_COPY_CHUNK_ROWS per transaction
+    IMPORT_USE_COPY = os.environ.get('IMPORT_USE_COPY', '1').lower() in ('1', 'true', 'yes')
+    IMPORT_COPY_CHUNK_ROWS = int(os.environ.get('IMPORT_COPY_CHUNK_ROWS', 50000))
+    # Batched path (SQLite, or COPY disabled): after IMPORT_SKU_INDEX_MIN_ROWS rows,
+    # load a compact in-memory index of every SKU so only changed rows are queried
+    IMPORT_SKU_INDEX = os.environ.get('IMPORT_SKU_INDEX', '1').lower() in ('1', 'true', 'yes')
+    IMPORT_SKU_INDEX_MIN_ROWS = int(os.environ.get('IMPORT_SKU_INDEX_MIN_ROWS', 5000))
+    
+    # Startup Configuration - create_app() warns when it takes longer than this
+    STARTUP_BUDGET_MS = int(os.environ.get('STARTUP_BUDGET_MS', 300))
     
     # Application Configuration
-    FLASK_ENV = os.environ.get('FLASK_ENV', 'production')
\ No newline at end of file
+    FLASK_ENV = os.environ.get('FLASK_ENV', 'production')
@@ -44,7 +44,10 @@ def create_demo_webhooks():
                     'event_types': ['product.created', 'product.updated', 'product.deleted'],
                     'active': True,
                     'secret': '',
-                    'headers': {'Content-Type': 'application/json'}
+                    'headers': {'Content-Type': 'application/json'},
+                    # Slack incoming webhooks allow about one message per second
+                    'rate_limit_per_second': 1,
+                    'adaptive_concurrency': True
                 },
                 {
                     'name': 'External Database Sync',
@@ -63,7 +66,9 @@ def create_demo_webhooks():
                     event_types=webhook_data['event_types'],
                     active=webhook_data['active'],
                     secret=webhook_data['secret'],
-                    headers=webhook_data['headers']
+                    headers=webhook_data['headers'],
+                    rate_limit_per_second=webhook_data.get('rate_limit_per_second'),
+                    adaptive_concurrency=webhook_data.get('adaptive_concurrency', False)
                 )
                 db.session.add(webhook)
             
@@ -0,0 +1,245 @@
+"""
+Connection pool profiles
+Builds SQLAlchemy engine options from environment settings and routes each
+workload (web requests, CSV imports, webhook delivery) to its own pool so a
+long import can't starve interactive requests of connections. Read-only
+sessions are sent to read replicas when they are configured and fresh.
+"""
+import os
+import threading
+import time
+import itertools
+from flask import current_app
+from sqlalchemy import event, text
+from sqlalchemy.engine import make_url
+from flask_sqlalchemy.session import Session
+
+WEB_POOL = None  # the default Flask-SQLAlchemy engine
+IMPORT_POOL = 'imports'
+WEBHOOK_POOL = 'webhooks'
+REPLICA_POOL = 'replica'  # bind keys are replica_0, replica_1, ...
+
+# Per-workload defaults: (pool_size, max_overflow, statement_timeout_ms)
+POOL_DEFAULTS = {
+    WEB_POOL: (5, 5, 30000),
+    IMPORT_POOL: (2, 0, 0),
+    WEBHOOK_POOL: (2, 2, 10000),
+    REPLICA_POOL: (5, 5, 30000),
+}
+
+def _env_int(name, default):
+    value = os.environ.get(name)
+    return int(value) if value not in (None, '') else default
+
+def _env_flag(name, default):
+    value = os.environ.get(name, '').strip().lower()
+    if value in ('', 'auto'):
+        return default
+    return value in ('1', 'true', 'yes', 'on')
+
+def _env_prefix(pool):
+    return {
+        WEB_POOL: 'DB',
+        IMPORT_POOL: 'DB_IMPORT',
+        WEBHOOK_POOL: 'DB_WEBHOOK',
+        REPLICA_POOL: 'DB_REPLICA',
+    }[pool]
+
+def _pool_for_bind(bind_key):
+    if bind_key and bind_key.startswith(f'{REPLICA_POOL}_'):
+        return REPLICA_POOL
+    return bind_key
+
+def uses_pgbouncer(url):
+    """PgBouncer/Supavisor in transaction mode: explicit DB_PGBOUNCER or the pooler port"""
+    parsed = make_url(url)
+    detected = parsed.port == 6543 or 'pooler.supabase.com' in (parsed.host or '')
+    return _env_flag('DB_PGBOUNCER', detected)
+
+def engine_options(url, pool=WEB_POOL):
+    """SQLAlchemy engine options for one workload pool on the given database URL"""
+    size, overflow, timeout_ms = POOL_DEFAULTS[pool]
+    prefix = _env_prefix(pool)
+    options = {
+        'pool_size': _env_int(f'{prefix}_POOL_SIZE', size),
+        'max_overflow': _env_int(f'{prefix}_MAX_OVERFLOW', overflow),
+        'pool_timeout': _env_int('DB_POOL_TIMEOUT', 20),
+        'pool_recycle': _env_int('DB_POOL_RECYCLE', 300),
+    }
+
+    parsed = make_url(url)
+    if not parsed.drivername.startswith('postgresql'):
+        options['pool_pre_ping'] = _env_flag('DB_POOL_PRE_PING', False)
+        return options
+
+    pgbouncer = uses_pgbouncer(url)
+    statement_timeout = _env_int(f'{prefix}_STATEMENT_TIMEOUT_MS', timeout_ms)
+    connect_args = {
+        'connect_timeout': _env_int('DB_CONNECT_TIMEOUT', 10),
+        'application_name': os.environ.get('DB_APPLICATION_NAME', 'render_flask_app'),
+    }
+
+    if pgbouncer:
+        # Transaction pooling rejects the "options" startup parameter and hands
+        # each transaction to a different server connection, so session-level
+        # settings are applied per transaction instead (see configure_engines).
+        # psycopg2 never uses server-side prepared statements; psycopg 3 must
+        # be told not to.
+        if parsed.get_dialect().driver == 'psycopg':
+            connect_args['prepare_threshold'] = None
+        # The pooler already health-checks server connections, so skip the
+        # extra SELECT 1 round trip on every checkout unless asked for it
+        options['pool_pre_ping'] = _env_flag('DB_POOL_PRE_PING', False)
+    else:
+        if statement_timeout:
+            connect_args['options'] = f'-c statement_timeout={statement_timeout}'
+        options['pool_pre_ping'] = _env_flag('DB_POOL_PRE_PING', True)
+
+    options['connect_args'] = connect_args
+    return options
+
+def pool_binds(url):
+    """SQLALCHEMY_BINDS entries giving imports and webhook delivery their own pools"""
+    return {
+        pool: dict(engine_options(url, pool), url=url)
+        for pool in (IMPORT_POOL, WEBHOOK_POOL)
+    }
+
+def replica_binds(urls):
+    """SQLALCHEMY_BINDS entries for read replicas, keyed replica_0, replica_1, ..."""
+    return {
+        f'{REPLICA_POOL}_{i}': dict(engine_options(url, REPLICA_POOL), url=url)
+        for i, url in enumerate(urls)
+    }
+
+def statement_timeouts():
+    """Statement timeout (ms) per pool, used when it must be set per transaction"""
+    return {
+        pool: _env_int(f'{_env_prefix(pool)}_STATEMENT_TIMEOUT_MS', defaults[2])
+        for pool, defaults in POOL_DEFAULTS.items()
+    }
+
+def configure_engines(app, engines):
+    """Attach per-transaction settings to engines that sit behind PgBouncer"""
+    timeouts = app.config.get('DB_STATEMENT_TIMEOUTS', {})
+    for pool, engine in engines.items():
+        if not engine.url.drivername.startswith('postgresql') or not uses_pgbouncer(engine.url):
+            continue
+        timeout = timeouts.get(_pool_for_bind(pool))
+        if not timeout:
+            continue
+
+        def set_local_timeout(conn, timeout=timeout):
+            conn.exec_driver_sql(f'SET LOCAL statement_timeout = {int(timeout)}')
+
+        event.listen(engine, 'begin', set_local_timeout)
+
+REPLICA_LAG_SQL = text(
+    "SELECT CASE"
+    " WHEN NOT pg_is_in_recovery() THEN 0"
+    " WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0"
+    " ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)"
+    " END"
+)
+
+def measure_replica_lag(engine):
+    """Replication lag in seconds, or None if the replica can't be reached"""
+    try:
+        with engine.connect() as conn:
+            if not engine.url.drivername.startswith('postgresql'):
+                # Local replicas (e.g. a second SQLite file) have no replication
+                conn.execute(text('SELECT 1'))
+                return 0.0
+            return float(conn.execute(REPLICA_LAG_SQL).scalar() or 0)
+    except Exception as e:
+        print(f"Replica {engine.url.host or engine.url.database} unavailable: {e}")
+        return None
+
+class ReplicaRouter:
+    """Round-robins sessions over replicas whose measured lag is within bounds.
+
+    Lag is sampled at most once per check interval per replica, in a
+    background thread: requests never wait for a measurement, they use the
+    last known sample, and only one measurement per replica runs at a time
+    (so an unreachable replica costs one connect timeout per interval, not
+    one per request). A replica that is too far behind, unreachable or not
+    yet sampled is skipped, and reads fall back to the primary when none
+    qualify.
+    """
+
+    def __init__(self, bind_keys, max_lag_seconds, check_interval_seconds):
+        self.bind_keys = list(bind_keys)
+        self.max_lag_seconds = max_lag_seconds
+        self.check_interval_seconds = check_interval_seconds
+        self._samples = {}
+        self._refreshing = {}  # bind key -> pid of the process measuring it
+        self._lock = threading.Lock()
+        self._counter = itertools.count()
+
+    def _is_fresh(self, key, engine):
+        now = time.monotonic()
+        with self._lock:
+            checked_at, lag = self._samples.get(key, (None, None))
+            stale = checked_at is None or now - checked_at >= self.check_interval_seconds
+            # A measurement inherited from the parent across a fork never finishes here
+            if stale and self._refreshing.get(key) != os.getpid():
+                self._refreshing[key] = os.getpid()
+                threading.Thread(
+                    target=self._refresh, args=(key, engine), name=f'replica-lag-{key}', daemon=True
+                ).start()
+        return lag is not None and lag <= self.max_lag_seconds
+
+    def _refresh(self, key, engine):
+        try:
+            lag = measure_replica_lag(engine)
+        finally:
+            with self._lock:
+                self._samples[key] = (time.monotonic(), lag)
+                self._refreshing.pop(key, None)
+
+    def choose(self, engines):
+        """Bind key of a fresh replica, or None for the primary"""
+        fresh = [key for key in self.bind_keys if self._is_fresh(key, engines[key])]
+        if not fresh:
+            return None
+        return fresh[next(self._counter) % len(fresh)]
+
+def init_replicas(app, engines):
+    """Register a ReplicaRouter when replica binds are configured"""
+    keys = sorted(key for key in engines if _pool_for_bind(key) == REPLICA_POOL)
+    if keys:
+        app.extensions['replica_router'] = ReplicaRouter(
+            keys,
+            app.config.get('REPLICA_MAX_LAG_SECONDS', 5),
+            app.config.get('REPLICA_LAG_CHECK_SECONDS', 5)
+        )
+
+class RoutingSession(Session):
+    """Session that sends queries to the pool selected with use_pool(), and
+    read-only sessions (see use_replica()) to a fresh replica when available"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None:
+            pool = self.info.get('pool')
+            if pool is not None:
+                engines = self._db.engines
+                if pool in engines:
+                    return engines[pool]
+            elif self.info.get('read_only') and not self._flushing:
+                router = current_app.extensions.get('replica_router')
+                if router is not None:
+                    # Chosen once per session, so related queries (a page and
+                    # its count) see the same snapshot; '' means the primary
+                    if 'replica' not in self.info:
+                        self.info['replica'] = router.choose(self._db.engines) or ''
+                    if self.info['replica']:
+                        return self._db.engines[self.info['replica']]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+def use_pool(session, pool):
+    """Route the session's next transactions to a workload pool"""
+    session.info['pool'] = pool
+
+def use_replica(session):
+    """Allow the session's reads to go to a replica; flushes stay on the primary"""
+    session.info['read_only'] = True
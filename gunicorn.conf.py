@@ -0,0 +1,81 @@
+"""
+Gunicorn production profile
+Loaded automatically by `gunicorn app:app` from the project directory.
+
+The app is imported once in the master (preload_app) and workers are
+forked from it, so templates, the precompressed dashboard and imported
+modules are shared copy-on-write. Nothing connects to the database at
+import time; engines are disposed in post_fork so every worker opens its
+own connections.
+
+Worker profiles (GUNICORN_WORKER_CLASS):
+    gthread (default)  WEB_CONCURRENCY processes x GUNICORN_THREADS threads
+    gevent             cooperative greenlets, GUNICORN_WORKER_CONNECTIONS per
+                       worker; needs the gevent and psycogreen packages
+    sync               one request per process, as before; change feed streams
+                       are cut below GUNICORN_TIMEOUT, and each holds a whole
+                       worker, so serve SSE clients with gthread or gevent
+"""
+import gc
+import os
+
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+
+if worker_class == 'gevent':
+    # Patch before the app (and its locks, sockets and threads) is preloaded
+    from gevent import monkey
+    monkey.patch_all()
+    try:
+        from psycogreen.gevent import patch_psycopg
+        patch_psycopg()  # make psycopg2 waits yield to other greenlets
+    except ImportError:
+        print("⚠️ psycogreen is not installed, database calls will block gevent workers")
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+
+# gthread: each thread holds at most one web-pool connection, so keep this
+# at or below DB_POOL_SIZE + DB_MAX_OVERFLOW (10 by default). Gunicorn turns
+# sync workers into gthread ones when threads > 1, so only set it for gthread.
+threads = int(os.environ.get('GUNICORN_THREADS', 8)) if worker_class == 'gthread' else 1
+
+# gevent: concurrent requests per worker; database work still queues on the
+# web pool, so raise DB_POOL_SIZE alongside this for database-heavy traffic
+worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', 200))
+
+# Imports and webhook tests can legitimately take a while
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+
+if worker_class == 'sync':
+    # A sync worker is killed once one request runs past `timeout`, so end
+    # long-polls and SSE streams before that; clients reconnect and resume
+    # from their cursor. Read by config.Config when the app is preloaded.
+    for name, default in (('CHANGE_FEED_MAX_WAIT_SECONDS', 30), ('CHANGE_FEED_STREAM_SECONDS', 300)):
+        os.environ[name] = str(min(float(os.environ.get(name, default)), max(1, timeout - 10)))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+
+preload_app = True
+
+# Heartbeat files on tmpfs, so a slow disk can't get workers killed
+if os.path.isdir('/dev/shm'):
+    worker_tmp_dir = '/dev/shm'
+
+loglevel = os.environ.get('GUNICORN_LOG_LEVEL', 'info')
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG') or None
+
+def when_ready(server):
+    # Everything allocated while preloading is never collected, so the GC
+    # doesn't touch (and un-share) those pages in every worker
+    gc.freeze()
+
+def post_fork(server, worker):
+    from app import app
+    from models import db
+
+    # Pools created in the master must not be shared with the children;
+    # close=False leaves any parent connections alone and starts fresh pools
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+    server.log.info(f"Worker {worker.pid} ready ({worker_class})")
@@ -0,0 +1,488 @@
+"""
+CSV product importer
+Rows are validated, normalized and applied in batches: existing products for
+a whole batch are fetched with one query, and rows whose content hash
+matches the stored one are skipped entirely (no UPDATE, no updated_at bump,
+no webhook), so re-importing an unchanged catalog does almost no writes.
+
+On PostgreSQL rows are instead streamed with COPY FROM STDIN into a
+temporary staging table and merged with a single
+INSERT ... SELECT ... ON CONFLICT (lower(sku)) statement per chunk. Other
+databases (SQLite) use the batched path, whose flushes are executemany.
+
+Uploads may be gzip (.csv.gz) or zstd (.csv.zst, needs the zstandard
+package) compressed; open_csv_rows() decompresses them as a stream, so only
+a few read buffers of the file are ever held in memory.
+
+Rejected rows are counted per error type and, when the import is given an
+error_path, written to a CSV report as they happen; only the first
+MAX_REPORTED_ERRORS messages are kept in memory for the response.
+"""
+import csv
+import gzip
+import importlib.util
+import io
+import itertools
+import os
+from datetime import datetime
+from sqlalchemy import column, select, table, text
+from sqlalchemy.exc import IntegrityError
+from models import db, Product, product_content_hash
+from change_feed import allocate_change_seqs
+from sku_index import SkuIndex, content_key
+
+BATCH_SIZE = 500
+COPY_CHUNK_ROWS = 50000
+SKU_INDEX_MIN_ROWS = 5000
+
+# Longest physical CSV line accepted, so a file without newlines (or a
+# decompression bomb) can't grow a single line without bound
+MAX_LINE_CHARS = 1024 * 1024
+READ_BUFFER_SIZE = 64 * 1024
+
+CSV_SUFFIXES = {'.csv': None, '.csv.gz': 'gzip', '.csv.zst': 'zstd'}
+
+MAX_REPORTED_ERRORS = 5
+ERROR_REPORT_HEADER = ('row_number', 'sku', 'error_type', 'reason')
+
+NAME_MAX_LENGTH = Product.__table__.c.name.type.length
+SKU_MAX_LENGTH = Product.__table__.c.sku.type.length
+
+STAGING_DDL = """
+CREATE TEMP TABLE import_staging (
+    row_number integer NOT NULL,
+    name text NOT NULL,
+    sku text NOT NULL,
+    description text NOT NULL,
+    content_hash text NOT NULL
+) ON COMMIT DROP
+"""
+
+MERGED_DDL = """
+CREATE TEMP TABLE import_merged (
+    id integer NOT NULL,
+    inserted boolean NOT NULL
+) ON COMMIT DROP
+"""
+
+COPY_SQL = (
+    "COPY import_staging (row_number, name, sku, description, content_hash) "
+    "FROM STDIN WITH (FORMAT csv)"
+)
+
+# The last row wins when a file repeats a SKU; rows whose content hash is
+# unchanged are filtered by the DO UPDATE ... WHERE and never written
+MERGE_SQL = text("""
+WITH incoming AS (
+    SELECT DISTINCT ON (lower(sku)) name, sku, description, content_hash
+    FROM import_staging
+    ORDER BY lower(sku), row_number DESC
+), merged AS (
+    INSERT INTO products (name, sku, description, content_hash, change_seq, created_at, updated_at)
+    SELECT name, sku, description, content_hash,
+           :first_seq + ROW_NUMBER() OVER () - 1, :now, :now
+    FROM incoming
+    ON CONFLICT (lower(sku)) DO UPDATE SET
+        name = EXCLUDED.name,
+        description = EXCLUDED.description,
+        content_hash = EXCLUDED.content_hash,
+        change_seq = EXCLUDED.change_seq,
+        updated_at = EXCLUDED.updated_at
+    WHERE products.content_hash IS DISTINCT FROM EXCLUDED.content_hash
+    RETURNING id, (xmax = 0) AS inserted
+)
+INSERT INTO import_merged (id, inserted) SELECT id, inserted FROM merged
+""")
+
+import_merged = table('import_merged', column('id'), column('inserted'))
+
+def csv_compression(filename):
+    """Compression of an upload by its file name: None, 'gzip' or 'zstd'.
+
+    Raises ValueError for anything that isn't a (compressed) CSV file.
+    """
+    name = (filename or '').lower()
+    for suffix, compression in CSV_SUFFIXES.items():
+        if name.endswith(suffix):
+            if compression == 'zstd' and not zstd_available():
+                raise ValueError('zstd uploads need the zstandard package; use .csv or .csv.gz')
+            return compression
+    raise ValueError('Only CSV files are allowed (.csv, .csv.gz or .csv.zst)')
+
+def zstd_available():
+    # zstandard is an optional dependency, only needed for .csv.zst
+    return importlib.util.find_spec('zstandard') is not None
+
+def decompressed(binary_stream, compression):
+    """Wrap a binary stream so reads return decompressed bytes"""
+    if compression == 'gzip':
+        return gzip.GzipFile(fileobj=binary_stream, mode='rb')
+    if compression == 'zstd':
+        import zstandard
+        return zstandard.ZstdDecompressor().stream_reader(binary_stream, read_size=READ_BUFFER_SIZE)
+    return binary_stream
+
+def bounded_lines(text_stream, max_chars=MAX_LINE_CHARS):
+    """Iterate lines like a file does, but refuse lines longer than max_chars"""
+    for line_number in itertools.count(1):
+        line = text_stream.readline(max_chars + 1)
+        if not line:
+            return
+        if len(line) > max_chars:
+            raise ValueError(f"Line {line_number} is longer than {max_chars} characters")
+        yield line
+
+def open_csv_rows(binary_stream, filename):
+    """csv.DictReader over an uploaded file, decompressing it on the fly"""
+    stream = decompressed(binary_stream, csv_compression(filename))
+    text_stream = io.TextIOWrapper(stream, encoding='utf-8', newline='')
+    return csv.DictReader(bounded_lines(text_stream))
+
+def csv_blocks(rows, rows_per_block=1000):
+    """Render staged rows as CSV bytes for COPY, a block at a time"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, quoting=csv.QUOTE_ALL, lineterminator='\n')
+    for start in range(0, len(rows), rows_per_block):
+        for row in rows[start:start + rows_per_block]:
+            writer.writerow((row['row_number'], row['name'], row['sku'], row['description'], row['content_hash']))
+        yield buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+
+class CsvBlockStream:
+    """Read-only file object over csv_blocks(), as psycopg2's copy_expert expects"""
+
+    def __init__(self, rows):
+        self.blocks = csv_blocks(rows)
+        self.buffer = b''
+
+    def read(self, size=-1):
+        while size < 0 or len(self.buffer) < size:
+            block = next(self.blocks, None)
+            if block is None:
+                break
+            self.buffer += block
+        if size < 0:
+            data, self.buffer = self.buffer, b''
+        else:
+            data, self.buffer = self.buffer[:size], self.buffer[size:]
+        return data
+
+class ImportReport:
+    def __init__(self, error_path=None):
+        self.processed_count = 0
+        self.created_count = 0
+        self.updated_count = 0
+        self.unchanged_count = 0
+        # COPY path only: earlier rows for a SKU that appears again later in
+        # the same chunk, superseded without being written
+        self.duplicate_count = 0
+        self.error_count = 0
+        self.error_counts = {}
+        self.errors = []
+        self.error_path = error_path
+        self._error_file = None
+        self._error_writer = None
+
+    def add_error(self, row_number, message, sku='', error_type='database'):
+        self.error_count += 1
+        self.error_counts[error_type] = self.error_counts.get(error_type, 0) + 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(f"Row {row_number}: {message}")
+        if self.error_path:
+            if self._error_writer is None:
+                self._open_error_report()
+            self._error_writer.writerow((row_number, sku, error_type, message))
+
+    def _open_error_report(self):
+        # Written beside the final name and renamed on close, so a download
+        # never sees a half-written report
+        os.makedirs(os.path.dirname(self.error_path), exist_ok=True)
+        self._error_file = open(f'{self.error_path}.tmp', 'w', newline='', encoding='utf-8')
+        self._error_writer = csv.writer(self._error_file)
+        self._error_writer.writerow(ERROR_REPORT_HEADER)
+
+    def close(self):
+        """Finish the error report, if any rows were rejected"""
+        if self._error_file is not None:
+            self._error_file.close()
+            os.replace(f'{self.error_path}.tmp', self.error_path)
+            self._error_file = self._error_writer = None
+
+    @property
+    def has_error_report(self):
+        return bool(self.error_path) and self.error_count > 0
+
+    def to_dict(self):
+        return {
+            'processed_count': self.processed_count,
+            'created_count': self.created_count,
+            'error_count': self.error_count,
+            'error_counts': self.error_counts,
+            'updated_count': self.updated_count,
+            'unchanged_count': self.unchanged_count,
+            'duplicate_count': self.duplicate_count,
+            'errors': self.errors  # First MAX_REPORTED_ERRORS only
+        }
+
+class ProductImporter:
+    """Applies CSV rows to the products table.
+
+    notify(event_type, product_data) is called after each batch commits for
+    every created or updated product; subscribed(event_type) lets the
+    importer skip building event payloads nobody listens to.
+
+    Once sku_index_min_rows rows have been processed on the batched path, and
+    the table held at least that many products beforehand, a SkuIndex of the
+    whole table is loaded so later batches only query the rows that changed.
+    """
+
+    def __init__(self, session, notify=None, subscribed=None, batch_size=BATCH_SIZE,
+                 use_copy=True, copy_chunk_rows=COPY_CHUNK_ROWS,
+                 use_sku_index=True, sku_index_min_rows=SKU_INDEX_MIN_ROWS,
+                 error_path=None):
+        self.session = session
+        self.notify = notify
+        self.subscribed = subscribed or (lambda event_type: notify is not None)
+        self.batch_size = batch_size
+        self.use_copy = use_copy
+        self.copy_chunk_rows = copy_chunk_rows
+        self.use_sku_index = use_sku_index
+        self.sku_index_min_rows = sku_index_min_rows
+        self.sku_index = None
+        self.report = ImportReport(error_path)
+
+    def run(self, rows):
+        """Import an iterable of CSV dict rows; returns the ImportReport"""
+        try:
+            if self._copy_supported():
+                for chunk in self._chunks(rows, self.copy_chunk_rows):
+                    self._apply_copy_chunk(chunk)
+            else:
+                for batch in self._chunks(rows, self.batch_size):
+                    self._apply_batch(batch)
+        finally:
+            self.report.close()
+        return self.report
+
+    def _copy_supported(self):
+        dialect = self.session.get_bind().dialect
+        return self.use_copy and dialect.name == 'postgresql' and dialect.driver in ('psycopg2', 'psycopg')
+
+    def _chunks(self, rows, size):
+        chunk = []
+        # Row numbers match the file, counting the header as line 1
+        for row_number, row in enumerate(rows, 2):
+            normalized = self._normalize(row_number, row)
+            if normalized is None:
+                continue
+            chunk.append(normalized)
+            if len(chunk) >= size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def _normalize(self, row_number, row):
+        name = (row.get('name') or '').strip()
+        sku = (row.get('sku') or '').strip()
+        if not name or not sku:
+            self.report.add_error(row_number, "Missing name or SKU", sku, 'missing_field')
+            return None
+        if len(name) > NAME_MAX_LENGTH or len(sku) > SKU_MAX_LENGTH:
+            self.report.add_error(
+                row_number,
+                f"Name or SKU too long (max {NAME_MAX_LENGTH}/{SKU_MAX_LENGTH} characters)",
+                sku[:SKU_MAX_LENGTH],
+                'too_long'
+            )
+            return None
+        description = (row.get('description') or '').strip()
+        return {
+            'row_number': row_number,
+            'name': name,
+            'sku': sku,
+            'description': description,
+            'content_hash': product_content_hash(name, description),
+        }
+
+    def _apply_batch(self, rows, exact=False):
+        if (
+            not exact
+            and self.use_sku_index
+            and self.sku_index is None
+            and self.report.processed_count >= self.sku_index_min_rows
+        ):
+            self._load_sku_index()
+
+        try:
+            events = self._write_batch(rows, None if exact else self.sku_index)
+            self.session.commit()
+        except Exception as e:
+            self.session.rollback()
+            if len(rows) == 1:
+                error_type = 'constraint' if isinstance(e, IntegrityError) else 'database'
+                # The driver's message, without SQLAlchemy's statement and parameters
+                reason = str(getattr(e, 'orig', None) or e)
+                self.report.add_error(rows[0]['row_number'], reason, rows[0]['sku'], error_type)
+            else:
+                # Isolate the failing rows by retrying the batch one row at a
+                # time, checked against the database rather than the index
+                # (another writer may have added a SKU since it was loaded)
+                for row in rows:
+                    self._apply_batch([row], exact=True)
+            return
+        if self.sku_index is not None:
+            for row in rows:
+                if row['outcome'] != 'unchanged':
+                    self.sku_index.add(row['sku'].lower(), row['content_hash'])
+        self._count(rows)
+        self._send_events(events)
+
+    def _load_sku_index(self):
+        # The index only saves work on rows that already exist, so a first
+        # load into a (nearly) empty table keeps using the per-batch query
+        total = self.session.execute(select(db.func.count()).select_from(Product)).scalar()
+        if total - self.report.created_count < self.sku_index_min_rows:
+            self.use_sku_index = False
+            return
+        self.sku_index = SkuIndex.load(self.session, total)
+        print(f"Loaded SKU index: {len(self.sku_index)} products, {self.sku_index.nbytes() // 1024} KB")
+
+    def _write_batch(self, rows, sku_index=None):
+        """Stage one batch in the session; returns (event_type, product_data) pairs"""
+        keys = {row['sku'].lower() for row in rows}
+        indexed = {}
+        if sku_index is not None:
+            # Only SKUs the index knows about whose content differs need the
+            # stored row; absent SKUs are new and matching ones are unchanged
+            known = {key: sku_index.get(key) for key in keys}
+            keys = {
+                row['sku'].lower() for row in rows
+                if known[row['sku'].lower()] not in (None, content_key(row['content_hash']))
+            }
+            indexed = {key: value for key, value in known.items() if value is not None and key not in keys}
+        existing = {}
+        if keys:
+            existing = {
+                product.sku.lower(): product
+                for product in Product.query.filter(db.func.lower(Product.sku).in_(keys))
+            }
+
+        touched = {}
+        for row in rows:
+            key = row['sku'].lower()
+            product = existing.get(key)
+            if product is None and indexed.get(key) == content_key(row['content_hash']):
+                row['outcome'] = 'unchanged'
+            elif product is None:
+                product = Product(
+                    name=row['name'],
+                    sku=row['sku'],
+                    description=row['description'],
+                    content_hash=row['content_hash']
+                )
+                self.session.add(product)
+                existing[key] = product
+                touched[key] = ('product.created', product)
+                row['outcome'] = 'created'
+            elif product.content_hash == row['content_hash']:
+                row['outcome'] = 'unchanged'
+            else:
+                product.name = row['name']
+                product.description = row['description']
+                product.content_hash = row['content_hash']
+                product.updated_at = datetime.utcnow()
+                # Keep an earlier "created" in the same batch as the event type
+                touched.setdefault(key, ('product.updated', product))
+                row['outcome'] = 'updated'
+
+        self.session.flush()
+        # Build payloads before commit expires the instances
+        wanted = {event_type for event_type in ('product.created', 'product.updated') if self.subscribed(event_type)}
+        return [
+            (event_type, product.to_dict())
+            for event_type, product in touched.values()
+            if event_type in wanted
+        ]
+
+    def _apply_copy_chunk(self, rows):
+        try:
+            inserted, updated, events = self._copy_merge(rows)
+            self.session.commit()
+        except Exception as e:
+            self.session.rollback()
+            print(f"COPY import failed ({e}), falling back to batched inserts")
+            for start in range(0, len(rows), self.batch_size):
+                self._apply_batch(rows[start:start + self.batch_size])
+            return
+        # DISTINCT ON keeps only the last row per SKU; the others are neither
+        # written nor unchanged
+        distinct = len({row['sku'].lower() for row in rows})
+        self.report.processed_count += len(rows)
+        self.report.created_count += inserted
+        self.report.updated_count += updated
+        self.report.duplicate_count += len(rows) - distinct
+        self.report.unchanged_count += distinct - inserted - updated
+        self._send_events(events)
+
+    def _copy_merge(self, rows):
+        """Stage rows with COPY and merge them in one statement, in the current transaction"""
+        conn = self.session.connection()
+        conn.exec_driver_sql(STAGING_DDL)
+        conn.exec_driver_sql(MERGED_DDL)
+        self._copy_rows(conn, rows)
+
+        first_seq = allocate_change_seqs(conn, len(rows))
+        conn.execute(MERGE_SQL, {'first_seq': first_seq, 'now': datetime.utcnow()})
+        inserted, updated = conn.exec_driver_sql(
+            "SELECT count(*) FILTER (WHERE inserted), count(*) FILTER (WHERE NOT inserted) FROM import_merged"
+        ).one()
+        if inserted or updated:
+            self.session.info['product_changes'] = True
+
+        events = []
+        wanted = {event_type for event_type in ('product.created', 'product.updated') if self.subscribed(event_type)}
+        if wanted and (inserted or updated):
+            result = self.session.execute(
+                select(Product, import_merged.c.inserted)
+                .join(import_merged, import_merged.c.id == Product.id)
+                .execution_options(yield_per=1000)
+            )
+            for product, was_inserted in result:
+                event_type = 'product.created' if was_inserted else 'product.updated'
+                if event_type in wanted:
+                    events.append((event_type, product.to_dict()))
+        return inserted, updated, events
+
+    def _copy_rows(self, conn, rows):
+        cursor = conn.connection.driver_connection.cursor()
+        try:
+            if conn.dialect.driver == 'psycopg2':
+                cursor.copy_expert(COPY_SQL, CsvBlockStream(rows), size=65536)
+            else:
+                with cursor.copy(COPY_SQL) as copy:
+                    for block in csv_blocks(rows):
+                        copy.write(block)
+        finally:
+            cursor.close()
+
+    def _count(self, rows):
+        for row in rows:
+            self.report.processed_count += 1
+            outcome = row.pop('outcome')
+            if outcome == 'created':
+                self.report.created_count += 1
+            elif outcome == 'updated':
+                self.report.updated_count += 1
+            else:
+                self.report.unchanged_count += 1
+
+    def _send_events(self, events):
+        if self.notify is None:
+            return
+        for event_type, product_data in events:
+            try:
+                self.notify(event_type, product_data)
+            except Exception:
+                pass  # Don't fail upload if webhook fails
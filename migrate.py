@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Versioned database migrations
+Schema setup is an explicit step so that importing the app never touches the
+database. Run this once per deploy (build.sh does) or after pulling changes:
+
+    python migrate.py           # apply pending migrations
+    python migrate.py status    # list applied and pending migrations
+"""
+import sys
+import time
+from datetime import datetime
+from sqlalchemy import bindparam, inspect, select
+from models import db, SchemaMigration, Product, ProductTombstone, ChangeCounter, product_content_hash
+
+MIGRATIONS = []
+
+def migration(version, description):
+    """Register a migration function; versions are applied in ascending order"""
+    def register(func):
+        MIGRATIONS.append((version, description, func))
+        MIGRATIONS.sort(key=lambda item: item[0])
+        return func
+    return register
+
+def add_column_if_missing(conn, table, column, ddl):
+    """Add a column unless create_all() already created it on a fresh database"""
+    existing = {col['name'] for col in inspect(conn).get_columns(table)}
+    if column not in existing:
+        conn.exec_driver_sql(f'ALTER TABLE {table} ADD COLUMN {column} {ddl}')
+
+@migration(1, 'Initial schema')
+def initial_schema(conn):
+    db.metadata.create_all(bind=conn)
+
+@migration(2, 'Add webhooks.accepts_gzip')
+def webhook_accepts_gzip(conn):
+    add_column_if_missing(conn, 'webhooks', 'accepts_gzip', 'BOOLEAN NOT NULL DEFAULT FALSE')
+
+@migration(3, 'Add product change feed (change_seq, tombstones, counter)')
+def product_change_feed(conn):
+    db.metadata.create_all(bind=conn, tables=[ProductTombstone.__table__, ChangeCounter.__table__])
+    add_column_if_missing(conn, 'products', 'change_seq', 'BIGINT')
+    conn.exec_driver_sql('CREATE INDEX IF NOT EXISTS ix_products_change_seq ON products (change_seq)')
+    # Existing rows enter the feed in id order
+    conn.exec_driver_sql('UPDATE products SET change_seq = id WHERE change_seq IS NULL')
+    counter = conn.execute(
+        ChangeCounter.__table__.select().where(ChangeCounter.__table__.c.name == 'products')
+    ).first()
+    if counter is None:
+        last = conn.exec_driver_sql('SELECT COALESCE(MAX(change_seq), 0) FROM products').scalar()
+        conn.execute(ChangeCounter.__table__.insert().values(name='products', value=last))
+
+@migration(4, 'Add products.content_hash')
+def product_content_hashes(conn):
+    add_column_if_missing(conn, 'products', 'content_hash', 'VARCHAR(32)')
+    products = Product.__table__
+    while True:
+        rows = conn.execute(
+            select(products.c.id, products.c.name, products.c.description)
+            .where(products.c.content_hash.is_(None))
+            .limit(1000)
+        ).fetchall()
+        if not rows:
+            break
+        conn.execute(
+            products.update().where(products.c.id == bindparam('row_id')),
+            [
+                {'row_id': row.id, 'content_hash': product_content_hash(row.name, row.description)}
+                for row in rows
+            ]
+        )
+
+@migration(5, 'Make the lower(sku) index unique')
+def unique_lower_sku(conn):
+    # Required as the conflict target of the COPY import's ON CONFLICT (lower(sku))
+    conn.exec_driver_sql('DROP INDEX IF EXISTS idx_products_sku_lower')
+    conn.exec_driver_sql('CREATE UNIQUE INDEX idx_products_sku_lower ON products (lower(sku))')
+
+@migration(6, 'Add webhook delivery counters and latency histogram')
+def webhook_delivery_stats(conn):
+    add_column_if_missing(conn, 'webhooks', 'success_count', 'INTEGER NOT NULL DEFAULT 0')
+    add_column_if_missing(conn, 'webhooks', 'failure_count', 'INTEGER NOT NULL DEFAULT 0')
+    add_column_if_missing(conn, 'webhooks', 'latency_histogram', 'JSON')
+
+@migration(7, 'Add webhook rate limit and concurrency settings')
+def webhook_rate_limits(conn):
+    add_column_if_missing(conn, 'webhooks', 'rate_limit_per_second', 'FLOAT')
+    add_column_if_missing(conn, 'webhooks', 'max_concurrency', 'INTEGER')
+    add_column_if_missing(conn, 'webhooks', 'adaptive_concurrency', 'BOOLEAN NOT NULL DEFAULT FALSE')
+
+@migration(8, 'Add webhook queue overflow counters')
+def webhook_overflow_counters(conn):
+    add_column_if_missing(conn, 'webhooks', 'dropped_count', 'INTEGER NOT NULL DEFAULT 0')
+    add_column_if_missing(conn, 'webhooks', 'coalesced_count', 'INTEGER NOT NULL DEFAULT 0')
+
+def applied_versions(conn):
+    SchemaMigration.__table__.create(bind=conn, checkfirst=True)
+    rows = conn.execute(SchemaMigration.__table__.select()).fetchall()
+    return {row.version for row in rows}
+
+def upgrade(app):
+    """Apply every pending migration, each in its own transaction"""
+    with app.app_context():
+        with db.engine.begin() as conn:
+            done = applied_versions(conn)
+
+        applied = 0
+        for version, description, func in MIGRATIONS:
+            if version in done:
+                continue
+            print(f"Applying migration {version}: {description}")
+            with db.engine.begin() as conn:
+                func(conn)
+                conn.execute(SchemaMigration.__table__.insert().values(
+                    version=version,
+                    description=description,
+                    applied_at=datetime.utcnow()
+                ))
+            applied += 1
+
+        print(f"Database schema is up to date ({applied} migration(s) applied)")
+        return applied
+
+def status(app):
+    with app.app_context():
+        with db.engine.begin() as conn:
+            done = applied_versions(conn)
+        for version, description, _ in MIGRATIONS:
+            state = 'applied' if version in done else 'pending'
+            print(f"{version:>4}  {state:<8} {description}")
+
+def main(argv):
+    from app import app
+
+    command = argv[1] if len(argv) > 1 else 'upgrade'
+    if command == 'status':
+        status(app)
+        return True
+    if command != 'upgrade':
+        print(f"Unknown command: {command} (expected 'upgrade' or 'status')")
+        return False
+
+    # Retry here rather than at import time: a slow database delays the
+    # deploy step, not every worker boot
+    max_retries = 3
+    for attempt in range(max_retries):
+        try:
+            upgrade(app)
+            return True
+        except Exception as e:
+            if attempt < max_retries - 1:
+                print(f"Migration attempt {attempt + 1} failed: {e}, retrying...")
+                time.sleep(2)
+            else:
+                print(f"Migration failed: {e}")
+    return False
+
+if __name__ == '__main__':
+    sys.exit(0 if main(sys.argv) else 1)
@@ -1,8 +1,39 @@
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
+import hashlib
+import math
 from sqlalchemy import Index
+from db_pools import RoutingSession
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
+
+def product_content_hash(name, description):
+    """Fingerprint of the imported fields, used to skip no-op re-imports"""
+    content = f"{name or ''}\x1f{description or ''}".encode('utf-8')
+    return hashlib.blake2b(content, digest_size=16).hexdigest()
+
+# Delivery latencies are kept as a sparse histogram {bucket: count} whose
+# bucket upper bounds grow by ~19% (2 ** 0.25), so histograms from every
+# worker merge by addition and percentiles are accurate to one bucket
+LATENCY_BUCKET_BASE = 2 ** 0.25
+
+def latency_bucket(latency_ms):
+    if latency_ms <= 1:
+        return 0
+    return math.ceil(math.log(latency_ms, LATENCY_BUCKET_BASE))
+
+def latency_percentile(histogram, fraction):
+    """Upper bound (ms) of the bucket holding the given fraction of samples"""
+    if not histogram:
+        return None
+    buckets = sorted((int(bucket), count) for bucket, count in histogram.items())
+    rank = fraction * sum(count for _, count in buckets)
+    seen = 0
+    for bucket, count in buckets:
+        seen += count
+        if seen >= rank:
+            return round(LATENCY_BUCKET_BASE ** bucket, 1)
+    return round(LATENCY_BUCKET_BASE ** buckets[-1][0], 1)
 
 class Product(db.Model):
     __tablename__ = 'products'
@@ -13,10 +44,12 @@ class Product(db.Model):
     description = db.Column(db.Text)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    change_seq = db.Column(db.BigInteger, index=True)  # Position in the change feed, assigned on every write
+    content_hash = db.Column(db.String(32))  # product_content_hash(name, description), kept current on every write
     
     # Create indexes for better query performance
     __table_args__ = (
-        Index('idx_products_sku_lower', db.func.lower(sku)),
+        Index('idx_products_sku_lower', db.func.lower(sku), unique=True),
         Index('idx_products_name', name),
     )
     
@@ -27,7 +60,8 @@ class Product(db.Model):
             'sku': self.sku,
             'description': self.description,
             'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
+            'change_seq': self.change_seq
         }
     
     @classmethod
@@ -35,6 +69,29 @@ class Product(db.Model):
         """Find product by SKU (case-insensitive)"""
         return cls.query.filter(db.func.lower(cls.sku) == db.func.lower(sku)).first()
 
+class ProductTombstone(db.Model):
+    __tablename__ = 'product_tombstones'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    product_id = db.Column(db.Integer, nullable=False)
+    sku = db.Column(db.String(100), nullable=False)
+    change_seq = db.Column(db.BigInteger, nullable=False, unique=True, index=True)
+    deleted_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'id': self.product_id,
+            'sku': self.sku,
+            'deleted_at': self.deleted_at.isoformat() if self.deleted_at else None,
+            'change_seq': self.change_seq
+        }
+
+class ChangeCounter(db.Model):
+    __tablename__ = 'change_counters'
+    
+    name = db.Column(db.String(50), primary_key=True)
+    value = db.Column(db.BigInteger, nullable=False, default=0)
+
 class Webhook(db.Model):
     __tablename__ = 'webhooks'
     
@@ -45,11 +102,22 @@ class Webhook(db.Model):
     active = db.Column(db.Boolean, default=True, nullable=False)
     secret = db.Column(db.String(100))  # Optional webhook secret
     headers = db.Column(db.JSON, default=dict)  # Additional headers to send
+    accepts_gzip = db.Column(db.Boolean, default=False, nullable=False)  # Send large payloads with Content-Encoding: gzip
+    rate_limit_per_second = db.Column(db.Float)  # Optional token-bucket send rate, per worker
+    max_concurrency = db.Column(db.Integer)  # Optional cap on in-flight deliveries, per worker
+    adaptive_concurrency = db.Column(db.Boolean, default=False, nullable=False)  # Back off on 429/latency, recover when healthy
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     last_triggered = db.Column(db.DateTime)
     last_response_code = db.Column(db.Integer)
     last_error = db.Column(db.Text)
+    # Cumulative delivery outcomes, flushed in batches by webhook_delivery.DeliveryStats
+    success_count = db.Column(db.Integer, default=0, nullable=False)
+    failure_count = db.Column(db.Integer, default=0, nullable=False)
+    # Deliveries a full per-worker queue dropped, or merged into a queued newer state
+    dropped_count = db.Column(db.Integer, default=0, nullable=False)
+    coalesced_count = db.Column(db.Integer, default=0, nullable=False)
+    latency_histogram = db.Column(db.JSON, default=dict)
     
     def to_dict(self):
         return {
@@ -60,11 +128,21 @@ class Webhook(db.Model):
             'active': self.active,
             'secret': self.secret,
             'headers': self.headers,
+            'accepts_gzip': self.accepts_gzip,
+            'rate_limit_per_second': self.rate_limit_per_second,
+            'max_concurrency': self.max_concurrency,
+            'adaptive_concurrency': self.adaptive_concurrency,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None,
             'last_triggered': self.last_triggered.isoformat() if self.last_triggered else None,
             'last_response_code': self.last_response_code,
-            'last_error': self.last_error
+            'last_error': self.last_error,
+            'success_count': self.success_count or 0,
+            'failure_count': self.failure_count or 0,
+            'dropped_count': self.dropped_count or 0,
+            'coalesced_count': self.coalesced_count or 0,
+            'latency_p50_ms': latency_percentile(self.latency_histogram, 0.5),
+            'latency_p95_ms': latency_percentile(self.latency_histogram, 0.95)
         }
 
 class UploadLog(db.Model):
@@ -100,4 +178,11 @@ class UploadLog(db.Model):
             'progress': round(progress, 2),
             'started_at': self.started_at.isoformat() if self.started_at else None,
             'completed_at': self.completed_at.isoformat() if self.completed_at else None
-        }
\ No newline at end of file
+        }
+
+class SchemaMigration(db.Model):
+    __tablename__ = 'schema_migrations'
+    
+    version = db.Column(db.Integer, primary_key=True)
+    description = db.Column(db.String(255), nullable=False)
+    applied_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -5,18 +5,19 @@ This script will drop all tables and recreate them with the correct schema
 """
 from app import app
 from models import db
+from migrate import upgrade
 
 def reset_database():
     with app.app_context():
         try:
             # Drop all tables
             print("Dropping all existing tables...")
-            db.drop_all()
+            db.drop_all(bind_key=None)  # primary only, never the replicas
             print("Tables dropped successfully")
             
-            # Create all tables with current schema
+            # Recreate tables by replaying the versioned migrations
             print("Creating tables with updated schema...")
-            db.create_all()
+            upgrade(app)
             print("Tables created successfully")
             
             print("Database reset completed!")
@@ -0,0 +1,109 @@
+"""
+HTTP response compression
+JSON, HTML and other text responses above COMPRESS_MIN_BYTES are compressed
+with the best encoding the client accepts: brotli when the optional brotli
+package is installed, otherwise gzip. Streamed responses (the SSE change
+feed, exports) are compressed incrementally and flushed after every chunk,
+so clients still receive each event as soon as it is produced.
+"""
+import zlib
+
+COMPRESSIBLE_TYPES = {
+    'application/json',
+    'application/javascript',
+    'text/css',
+    'text/csv',
+    'text/event-stream',
+    'text/html',
+    'text/javascript',
+    'text/plain',
+}
+
+# Dynamic responses favour speed; precompressed assets use the maximum levels
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+def brotli_module():
+    try:
+        import brotli  # optional dependency, enables Content-Encoding: br
+    except ImportError:
+        return None
+    return brotli
+
+def available_encodings():
+    return ('br', 'gzip') if brotli_module() else ('gzip',)
+
+def negotiate_encoding(accept_encodings, offered=None):
+    """Preferred encoding among offered that the client accepts, or None for identity.
+
+    accept_encodings is werkzeug's request.accept_encodings; ties go to the
+    first offered encoding (brotli).
+    """
+    best, best_quality = None, 0
+    for encoding in offered or available_encodings():
+        quality = accept_encodings.quality(encoding)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+def compress_bytes(data, encoding, gzip_level=GZIP_LEVEL, brotli_quality=BROTLI_QUALITY):
+    if encoding == 'br':
+        return brotli_module().compress(data, quality=brotli_quality)
+    # wbits=31 writes a gzip header and trailer; no filename or mtime, so
+    # the same input always produces the same bytes
+    compressor = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)
+    return compressor.compress(data) + compressor.flush()
+
+def compress_chunks(chunks, encoding):
+    """Compress an iterable of response chunks, flushing after each one"""
+    if encoding == 'br':
+        compressor = brotli_module().Compressor(quality=BROTLI_QUALITY)
+        flush = compressor.flush
+        finish = compressor.finish
+    else:
+        compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+        flush = lambda: compressor.flush(zlib.Z_SYNC_FLUSH)
+        finish = compressor.flush
+
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            if chunk:
+                yield compressor.compress(chunk) + flush()
+        yield finish()
+    finally:
+        close = getattr(chunks, 'close', None)
+        if close is not None:
+            close()
+
+def compress_response(response, accept_encodings, min_bytes):
+    """Compress a Flask response in place when it is worth it; returns the response"""
+    if (
+        response.mimetype not in COMPRESSIBLE_TYPES
+        or response.status_code < 200
+        or response.status_code in (204, 206, 304)
+        or response.direct_passthrough
+        or 'Content-Encoding' in response.headers
+    ):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    encoding = negotiate_encoding(accept_encodings)
+    if encoding is None:
+        return response
+
+    if response.is_streamed:
+        response.response = compress_chunks(response.response, encoding)
+        response.headers.pop('Content-Length', None)
+    else:
+        data = response.get_data()
+        if len(data) < min_bytes:
+            return response
+        compressed = compress_bytes(data, encoding)
+        if len(compressed) >= len(data):
+            return response
+        response.set_data(compressed)
+
+    response.headers['Content-Encoding'] = encoding
+    return response
@@ -5,8 +5,11 @@ Run this file to start the Flask application locally
 """
 import os
 from app import app
+from migrate import upgrade
 
 if __name__ == '__main__':
     # Force local development settings
     os.environ['FLASK_ENV'] = 'development'
+    # Local runs bootstrap the schema; production runs migrate.py at deploy time
+    upgrade(app)
     app.run(host='127.0.0.1', port=5000, debug=True)
\ No newline at end of file
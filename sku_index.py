@@ -0,0 +1,99 @@
+"""
+Compact SKU index for imports
+Maps every product's lower(sku) to a prefix of its content hash so the
+batched importer can tell new, unchanged and changed rows apart without a
+query per batch. Keys and values are 64-bit hashes kept in two array('Q')
+open-addressing tables at most 2/3 full: 24-32 bytes per SKU, against
+several hundred for a dict of strings.
+
+"Not in the index" is exact (no false negatives). A hit may be a 64-bit
+collision, so rows that look changed are still fetched from the database
+before they are updated; a row is only skipped as unchanged when both its
+SKU hash and its content hash match.
+"""
+import hashlib
+from array import array
+from sqlalchemy import func, select
+from models import Product
+
+EMPTY = 0
+MAX_LOAD = 2 / 3
+MIN_CAPACITY = 1024
+
+def sku_key(sku):
+    """64-bit hash of a lowercased SKU; never EMPTY"""
+    digest = hashlib.blake2b(sku.encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'little') or 1
+
+def content_key(content_hash):
+    """First 64 bits of a product_content_hash() hex digest"""
+    return int(content_hash[:16], 16) if content_hash else 0
+
+class SkuIndex:
+    def __init__(self, expected=0):
+        capacity = MIN_CAPACITY
+        while capacity * MAX_LOAD < expected:
+            capacity *= 2
+        self._allocate(capacity)
+
+    def _allocate(self, capacity):
+        self.mask = capacity - 1
+        self.keys = array('Q', bytes(8 * capacity))
+        self.values = array('Q', bytes(8 * capacity))
+        self.count = 0
+
+    @classmethod
+    def load(cls, session, expected=None):
+        """Index every product's SKU and content hash, streaming the rows"""
+        if expected is None:
+            expected = session.execute(select(func.count()).select_from(Product)).scalar()
+        index = cls(expected)
+        rows = session.execute(
+            select(func.lower(Product.sku), Product.content_hash)
+            .execution_options(yield_per=10000)
+        )
+        for sku, content_hash in rows:
+            index.add(sku, content_hash)
+        return index
+
+    def _slot(self, key):
+        mask, keys = self.mask, self.keys
+        slot = key & mask
+        while keys[slot] != EMPTY and keys[slot] != key:
+            slot = (slot + 1) & mask
+        return slot
+
+    def get(self, lower_sku):
+        """Content key for a lowercased SKU, or None when it is certainly absent"""
+        slot = self._slot(sku_key(lower_sku))
+        if self.keys[slot] == EMPTY:
+            return None
+        return self.values[slot]
+
+    def add(self, lower_sku, content_hash):
+        """Insert or update a SKU, e.g. after an import batch commits"""
+        key = sku_key(lower_sku)
+        slot = self._slot(key)
+        if self.keys[slot] == EMPTY:
+            if (self.count + 1) > MAX_LOAD * (self.mask + 1):
+                self._grow()
+                slot = self._slot(key)
+            self.keys[slot] = key
+            self.count += 1
+        self.values[slot] = content_key(content_hash)
+
+    def _grow(self):
+        keys, values = self.keys, self.values
+        self._allocate(2 * (self.mask + 1))
+        for key, value in zip(keys, values):
+            if key != EMPTY:
+                slot = self._slot(key)
+                self.keys[slot] = key
+                self.values[slot] = value
+                self.count += 1
+
+    def __len__(self):
+        return self.count
+
+    def nbytes(self):
+        return self.keys.itemsize * len(self.keys) + self.values.itemsize * len(self.values)
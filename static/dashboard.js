@@ -0,0 +1,777 @@
+let currentPage = 1;
+let currentProductId = null;
+let currentWebhookId = null;
+
+// Initialize app
+document.addEventListener('DOMContentLoaded', function() {
+    setupFileUpload();
+    setupSearch();
+    loadProducts();
+    loadWebhooks();
+});
+
+// Tab switching
+document.querySelectorAll('a[data-bs-toggle="pill"]').forEach(tab => {
+    tab.addEventListener('shown.bs.tab', function(event) {
+        if (event.target.getAttribute('href') === '#products-panel') {
+            loadProducts();
+        } else if (event.target.getAttribute('href') === '#webhooks-panel') {
+            loadWebhooks();
+        }
+    });
+});
+
+// File Upload Functionality
+function setupFileUpload() {
+    const uploadZone = document.getElementById('uploadZone');
+    const fileInput = document.getElementById('fileInput');
+
+    uploadZone.addEventListener('click', () => fileInput.click());
+    uploadZone.addEventListener('dragover', handleDragOver);
+    uploadZone.addEventListener('dragleave', handleDragLeave);
+    uploadZone.addEventListener('drop', handleDrop);
+    fileInput.addEventListener('change', handleFileSelect);
+}
+
+function handleDragOver(e) {
+    e.preventDefault();
+    e.stopPropagation();
+    const uploadZone = e.currentTarget;
+    uploadZone.classList.add('border-success', 'bg-light');
+    uploadZone.style.transform = 'scale(1.02)';
+    const icon = uploadZone.querySelector('#uploadIcon');
+    if (icon) icon.classList.add('fa-bounce');
+}
+
+function handleDragLeave(e) {
+    e.preventDefault();
+    e.stopPropagation();
+    const uploadZone = e.currentTarget;
+    uploadZone.classList.remove('border-success', 'bg-light');
+    uploadZone.style.transform = 'scale(1)';
+    const icon = uploadZone.querySelector('#uploadIcon');
+    if (icon) icon.classList.remove('fa-bounce');
+}
+
+function handleDrop(e) {
+    e.preventDefault();
+    e.stopPropagation();
+    const uploadZone = e.currentTarget;
+    uploadZone.classList.remove('border-success', 'bg-light');
+    uploadZone.style.transform = 'scale(1)';
+    const icon = uploadZone.querySelector('#uploadIcon');
+    if (icon) icon.classList.remove('fa-bounce');
+
+    const files = e.dataTransfer.files;
+    if (files.length > 0) {
+        uploadFile(files[0]);
+    }
+}
+
+function handleFileSelect(e) {
+    const file = e.target.files[0];
+    if (file) {
+        uploadFile(file);
+    }
+}
+
+function uploadFile(file) {
+    const name = file.name.toLowerCase();
+    if (!['.csv', '.csv.gz', '.csv.zst'].some(suffix => name.endsWith(suffix))) {
+        showAlert('Only CSV files (.csv, .csv.gz or .csv.zst) are allowed.', 'danger');
+        return;
+    }
+
+    // File size validation (500MB limit)
+    const maxSize = 500 * 1024 * 1024;
+    if (file.size > maxSize) {
+        showAlert(`File too large. Maximum size is 500MB.`, 'danger');
+        return;
+    }
+
+    // Show progress
+    document.getElementById('progressContainer').style.display = 'block';
+    document.getElementById('uploadResult').innerHTML = '';
+
+    const progressBar = document.getElementById('progressBar');
+    const progressPercent = document.getElementById('progressPercent');
+    const progressText = document.getElementById('progressText');
+
+    progressText.textContent = 'Uploading...';
+    progressBar.style.width = '0%';
+    progressPercent.textContent = '0%';
+
+    uploadInChunks(file, (sent, total) => {
+        const percent = Math.floor(sent / total * 90);
+        progressBar.style.width = `${percent}%`;
+        progressPercent.textContent = `${percent}%`;
+        if (sent === total) {
+            progressText.textContent = 'Processing...';
+        }
+    })
+    .then(data => {
+        if (data.error) {
+            throw new Error(data.error);
+        }
+        showUploadComplete(data);
+    })
+    .catch(error => {
+        showAlert(error.message, 'danger');
+        document.getElementById('progressContainer').style.display = 'none';
+    });
+}
+
+// Chunked, resumable upload: chunks go up in parallel and an interrupted
+// upload of the same file resumes with only the chunks still missing
+const PARALLEL_CHUNKS = 4;
+const CHUNK_RETRIES = 5;
+
+async function uploadJson(url, options = {}) {
+    const response = await fetch(url, options);
+    const data = await response.json();
+    if (!response.ok) {
+        const error = new Error(data.error || `HTTP ${response.status}`);
+        error.status = response.status;
+        throw error;
+    }
+    return data;
+}
+
+async function chunkChecksum(blob) {
+    // crypto.subtle is only available on HTTPS and localhost
+    if (!window.crypto || !window.crypto.subtle) {
+        return null;
+    }
+    const digest = await crypto.subtle.digest('SHA-256', await blob.arrayBuffer());
+    return Array.from(new Uint8Array(digest)).map(b => b.toString(16).padStart(2, '0')).join('');
+}
+
+async function sendChunk(uploadId, file, offset, chunkSize) {
+    const blob = file.slice(offset, offset + chunkSize);
+    const checksum = await chunkChecksum(blob);
+    for (let attempt = 0; ; attempt++) {
+        try {
+            return await uploadJson(`/api/uploads/${uploadId}?offset=${offset}`, {
+                method: 'PUT',
+                headers: checksum ? {'X-Chunk-SHA256': checksum} : {},
+                body: blob
+            });
+        } catch (error) {
+            if (attempt + 1 >= CHUNK_RETRIES || (error.status && error.status < 500 && error.status !== 422)) {
+                throw error;
+            }
+            await new Promise(resolve => setTimeout(resolve, 500 * 2 ** attempt));
+        }
+    }
+}
+
+async function uploadInChunks(file, onProgress) {
+    const resumeKey = `upload:${file.name}:${file.size}:${file.lastModified}`;
+    let upload = null;
+
+    const savedId = localStorage.getItem(resumeKey);
+    if (savedId) {
+        try {
+            upload = await uploadJson(`/api/uploads/${savedId}`);
+        } catch (error) {
+            localStorage.removeItem(resumeKey);
+        }
+    }
+    if (!upload) {
+        upload = await uploadJson('/api/uploads', {
+            method: 'POST',
+            headers: {'Content-Type': 'application/json'},
+            body: JSON.stringify({filename: file.name, size: file.size})
+        });
+        localStorage.setItem(resumeKey, upload.upload_id);
+    }
+
+    const pending = upload.missing_offsets.slice();
+    let sent = upload.received_bytes;
+    onProgress(sent, file.size);
+
+    const worker = async () => {
+        while (pending.length > 0) {
+            const offset = pending.shift();
+            const result = await sendChunk(upload.upload_id, file, offset, upload.chunk_size);
+            sent += result.received;
+            onProgress(Math.min(sent, file.size), file.size);
+        }
+    };
+    await Promise.all(Array.from({length: PARALLEL_CHUNKS}, worker));
+
+    const data = await uploadJson(`/api/uploads/${upload.upload_id}/complete`, {method: 'POST'});
+    localStorage.removeItem(resumeKey);
+    return data;
+}
+
+function showUploadComplete(data) {
+    const progressBar = document.getElementById('progressBar');
+    const progressPercent = document.getElementById('progressPercent');
+    const progressText = document.getElementById('progressText');
+
+    // Show complete
+    progressBar.style.width = '100%';
+    progressBar.classList.remove('progress-bar-animated');
+    progressBar.classList.add('bg-success');
+    progressPercent.textContent = '100%';
+    progressText.textContent = 'Upload completed!';
+
+    // Show results
+    const processedCount = data.processed_count || 0;
+    const errorCount = data.error_count || 0;
+    const updatedCount = data.updated_count || 0;
+    const createdCount = data.created_count || 0;
+
+    document.getElementById('uploadResult').innerHTML = `
+        <div class="alert alert-success">
+            <h6><i class="fas fa-check-circle me-2"></i>Upload Complete!</h6>
+            <p>Processed: <strong>${processedCount}</strong> products</p>
+            ${createdCount > 0 ? `<p>Created: <strong>${createdCount}</strong> new products</p>` : ''}
+            ${updatedCount > 0 ? `<p>Updated: <strong>${updatedCount}</strong> existing products</p>` : ''}
+            ${errorCount > 0 ? `<p class="text-warning">Errors: <strong>${errorCount}</strong>
+                <small>(${Object.entries(data.error_counts || {}).map(([type, count]) => `${type.replace('_', ' ')}: ${count}`).join(', ')})</small>
+                ${data.error_report_url ? `<a href="${data.error_report_url}" class="ms-2"><i class="fas fa-download me-1"></i>Download error report</a>` : ''}
+            </p>` : ''}
+            ${data.errors && data.errors.length > 0 ? `
+                <details>
+                    <summary>View Errors</summary>
+                    <ul class="mt-2">
+                        ${data.errors.map(error => `<li>${error}</li>`).join('')}
+                    </ul>
+                </details>
+            ` : ''}
+        </div>
+    `;
+
+    // Refresh products
+    loadProducts();
+
+    // Hide progress after 3 seconds
+    setTimeout(() => {
+        document.getElementById('progressContainer').style.display = 'none';
+    }, 3000);
+}
+
+function pollUploadProgress(taskId) {
+    const progressBar = document.getElementById('progressBar');
+    const progressPercent = document.getElementById('progressPercent');
+    const progressText = document.getElementById('progressText');
+    const progressDetails = document.getElementById('progressDetails');
+
+    function updateProgress() {
+        fetch(`/upload_progress/${taskId}`)
+        .then(response => response.json())
+        .then(data => {
+            if (data.error) {
+                throw new Error(data.error);
+            }
+
+            const progress = data.progress || 0;
+            progressBar.style.width = progress + '%';
+            progressPercent.textContent = Math.round(progress) + '%';
+
+            if (data.status === 'processing') {
+                progressText.textContent = 'Processing CSV file...';
+                progressDetails.innerHTML = `
+                    Processed: ${data.processed_rows || 0} / ${data.total_rows || 0} rows<br>
+                    Success: ${data.success_count || 0} | Errors: ${data.error_count || 0}
+                `;
+                setTimeout(updateProgress, 1000);
+            } else if (data.status === 'completed') {
+                progressBar.classList.remove('progress-bar-animated');
+                progressBar.classList.add('bg-success');
+                progressText.textContent = 'Upload completed!';
+                progressDetails.innerHTML = `
+                    Total: ${data.total_rows} rows<br>
+                    Success: ${data.success_count} | Errors: ${data.error_count}
+                `;
+
+                let resultHtml = `<div class="alert alert-success">
+                    <i class="fas fa-check-circle me-2"></i>
+                    Successfully processed ${data.success_count} products!
+                </div>`;
+
+                if (data.error_count > 0) {
+                    resultHtml += `<div class="alert alert-warning">
+                        <i class="fas fa-exclamation-triangle me-2"></i>
+                        ${data.error_count} rows had errors and were skipped.
+                    </div>`;
+                }
+
+                document.getElementById('uploadResult').innerHTML = resultHtml;
+                loadProducts(); // Refresh products list
+            } else if (data.status === 'failed') {
+                progressBar.classList.remove('progress-bar-animated');
+                progressBar.classList.add('bg-danger');
+                progressText.textContent = 'Upload failed!';
+                progressDetails.textContent = data.error || 'Unknown error occurred';
+
+                document.getElementById('uploadResult').innerHTML = `
+                    <div class="alert alert-danger">
+                        <i class="fas fa-times-circle me-2"></i>
+                        Upload failed: ${data.error || 'Unknown error'}
+                    </div>
+                `;
+            }
+        })
+        .catch(error => {
+            progressBar.classList.remove('progress-bar-animated');
+            progressBar.classList.add('bg-danger');
+            progressText.textContent = 'Error checking progress';
+            progressDetails.textContent = error.message;
+        });
+    }
+
+    updateProgress();
+}
+
+// Products Management
+function setupSearch() {
+    let debounceTimer;
+    document.getElementById('searchInput').addEventListener('input', function() {
+        clearTimeout(debounceTimer);
+        debounceTimer = setTimeout(() => {
+            currentPage = 1;
+            loadProducts();
+        }, 500);
+    });
+
+
+}
+
+function loadProducts() {
+    const search = document.getElementById('searchInput').value;
+
+    let url = `/api/products?page=${currentPage}&per_page=20`;
+    if (search) url += `&search=${encodeURIComponent(search)}`;
+
+    fetch(url)
+    .then(response => response.json())
+    .then(data => {
+        if (data.error) {
+            throw new Error(data.error);
+        }
+        displayProducts(data.products);
+        updatePagination(data);
+    })
+    .catch(error => {
+        showAlert(error.message, 'danger');
+    });
+}
+
+function displayProducts(products) {
+    const tbody = document.getElementById('productsTableBody');
+
+    if (products.length === 0) {
+        tbody.innerHTML = '<tr><td colspan="5" class="text-center">No products found</td></tr>';
+        return;
+    }
+
+    tbody.innerHTML = products.map(product => `
+        <tr>
+            <td><code>${product.sku}</code></td>
+            <td><strong>${product.name}</strong></td>
+            <td>${product.description || '<em>No description</em>'}</td>
+            <td>${formatDate(product.updated_at)}</td>
+            <td>
+                <button class="btn btn-sm btn-outline-primary me-1" 
+                        onclick="editProduct(${product.id})" title="Edit Product">
+                    <i class="fas fa-edit"></i>
+                </button>
+                <button class="btn btn-sm btn-outline-danger" 
+                        onclick="deleteProduct(${product.id})" title="Delete Product">
+                    <i class="fas fa-trash"></i>
+                </button>
+            </td>
+        </tr>
+    `).join('');
+}
+
+function updatePagination(data) {
+    const info = document.getElementById('paginationInfo');
+    const list = document.getElementById('paginationList');
+
+    const start = ((data.page - 1) * data.per_page) + 1;
+    const end = Math.min(data.page * data.per_page, data.total);
+
+    info.innerHTML = `Showing ${start}-${end} of ${data.total} products`;
+
+    if (data.pages <= 1) {
+        list.innerHTML = '';
+        return;
+    }
+
+    let paginationHtml = '';
+
+    // Previous button
+    paginationHtml += `
+        <li class="page-item ${data.page === 1 ? 'disabled' : ''}">
+            <a class="page-link" href="#" onclick="changePage(${data.page - 1})">Previous</a>
+        </li>
+    `;
+
+    // Page numbers
+    const startPage = Math.max(1, data.page - 2);
+    const endPage = Math.min(data.pages, data.page + 2);
+
+    for (let i = startPage; i <= endPage; i++) {
+        paginationHtml += `
+            <li class="page-item ${i === data.page ? 'active' : ''}">
+                <a class="page-link" href="#" onclick="changePage(${i})">${i}</a>
+            </li>
+        `;
+    }
+
+    // Next button
+    paginationHtml += `
+        <li class="page-item ${data.page === data.pages ? 'disabled' : ''}">
+            <a class="page-link" href="#" onclick="changePage(${data.page + 1})">Next</a>
+        </li>
+    `;
+
+    list.innerHTML = paginationHtml;
+}
+
+function changePage(page) {
+    currentPage = page;
+    loadProducts();
+}
+
+function showAddProductModal() {
+    currentProductId = null;
+    document.getElementById('productModalTitle').textContent = 'Add Product';
+    document.getElementById('productForm').reset();
+    new bootstrap.Modal(document.getElementById('productModal')).show();
+}
+
+function editProduct(id) {
+    currentProductId = id;
+    document.getElementById('productModalTitle').textContent = 'Edit Product';
+
+    // Fetch product data from API
+    fetch(`/api/products?page=1&per_page=1000`)
+    .then(response => response.json())
+    .then(data => {
+        const product = data.products.find(p => p.id === id);
+        if (product) {
+            document.getElementById('productSku').value = product.sku || '';
+            document.getElementById('productName').value = product.name || '';
+            document.getElementById('productDescription').value = product.description || '';
+
+            new bootstrap.Modal(document.getElementById('productModal')).show();
+        } else {
+            showAlert('Product not found', 'danger');
+        }
+    })
+    .catch(error => {
+        showAlert('Error loading product: ' + error.message, 'danger');
+    });
+}
+
+function saveProduct() {
+    const form = document.getElementById('productForm');
+    if (!form.checkValidity()) {
+        form.reportValidity();
+        return;
+    }
+
+    const data = {
+        name: document.getElementById('productName').value,
+        sku: document.getElementById('productSku').value,
+        description: document.getElementById('productDescription').value
+    };
+
+    const url = currentProductId ? `/api/products/${currentProductId}` : '/api/products';
+    const method = currentProductId ? 'PUT' : 'POST';
+
+    fetch(url, {
+        method: method,
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify(data)
+    })
+    .then(response => response.json())
+    .then(result => {
+        if (result.error) {
+            throw new Error(result.error);
+        }
+
+        bootstrap.Modal.getInstance(document.getElementById('productModal')).hide();
+        loadProducts();
+        showAlert(currentProductId ? 'Product updated successfully!' : 'Product created successfully!', 'success');
+    })
+    .catch(error => {
+        showAlert(error.message, 'danger');
+    });
+}
+
+function deleteProduct(id) {
+    if (!confirm('Are you sure you want to delete this product?')) {
+        return;
+    }
+
+    fetch(`/api/products/${id}`, {
+        method: 'DELETE'
+    })
+    .then(response => response.json())
+    .then(result => {
+        if (result.error) {
+            throw new Error(result.error);
+        }
+        loadProducts();
+        showAlert('Product deleted successfully!', 'success');
+    })
+    .catch(error => {
+        showAlert(error.message, 'danger');
+    });
+}
+
+function confirmBulkDelete() {
+    new bootstrap.Modal(document.getElementById('bulkDeleteModal')).show();
+}
+
+function executeBulkDelete() {
+    fetch('/api/products/bulk-delete', {
+        method: 'DELETE'
+    })
+    .then(response => response.json())
+    .then(result => {
+        if (result.error) {
+            throw new Error(result.error);
+        }
+
+        bootstrap.Modal.getInstance(document.getElementById('bulkDeleteModal')).hide();
+        loadProducts();
+        showAlert(`Successfully deleted ${result.deleted_count} products!`, 'success');
+    })
+    .catch(error => {
+        showAlert(error.message, 'danger');
+    });
+}
+
+// Webhook Management
+function loadWebhooks() {
+    fetch('/api/webhooks')
+    .then(response => response.json())
+    .then(data => {
+        // Fix: Handle both array and object responses
+        if (data.error) {
+            showAlert('Error loading webhooks: ' + data.error, 'danger');
+            displayWebhooks([]);
+        } else {
+            // Handle the correct API response format with {webhooks: [...]}
+            displayWebhooks(data.webhooks || []);
+        }
+    })
+    .catch(error => {
+        console.error('Webhook load error:', error);
+        showAlert('Error loading webhooks: ' + error.message, 'danger');
+        displayWebhooks([]);
+    });
+}
+
+function displayWebhooks(webhooks) {
+    const tbody = document.getElementById('webhooksTableBody');
+
+    // Fix: Check if webhooks exists and is array
+    if (!webhooks || !Array.isArray(webhooks) || webhooks.length === 0) {
+        tbody.innerHTML = '<tr><td colspan="6" class="text-center">No webhooks configured</td></tr>';
+        return;
+    }
+
+    tbody.innerHTML = webhooks.map(webhook => `
+        <tr>
+            <td>${webhook.name}</td>
+            <td><code>${webhook.url}</code></td>
+            <td>
+                ${webhook.event_types.map(event => 
+                    `<span class="badge bg-info me-1">${event}</span>`
+                ).join('')}
+            </td>
+            <td>
+                <span class="badge ${webhook.active ? 'bg-success' : 'bg-secondary'}">
+                    ${webhook.active ? 'Active' : 'Inactive'}
+                </span>
+            </td>
+            <td>
+                ${webhook.last_triggered ? formatDate(webhook.last_triggered) : 'Never'}
+                ${webhook.success_count || webhook.failure_count || webhook.dropped_count || webhook.coalesced_count ? `
+                    <div class="small text-muted">
+                        ${webhook.success_count} ok / ${webhook.failure_count} failed
+                        ${webhook.dropped_count || webhook.coalesced_count ? `<br>${webhook.dropped_count} dropped / ${webhook.coalesced_count} coalesced` : ''}
+                        ${webhook.latency_p50_ms !== null ? `<br>p50 ${webhook.latency_p50_ms} ms, p95 ${webhook.latency_p95_ms} ms` : ''}
+                    </div>
+                ` : ''}
+            </td>
+            <td>
+                <button class="btn btn-sm btn-outline-primary me-1" 
+                        onclick="editWebhook(${webhook.id})">
+                    <i class="fas fa-edit"></i>
+                </button>
+                <button class="btn btn-sm btn-outline-info me-1" 
+                        onclick="testWebhook(${webhook.id})">
+                    <i class="fas fa-bolt"></i>
+                </button>
+                <button class="btn btn-sm btn-outline-danger" 
+                        onclick="deleteWebhook(${webhook.id})">
+                    <i class="fas fa-trash"></i>
+                </button>
+            </td>
+        </tr>
+    `).join('');
+}
+
+function showAddWebhookModal() {
+    currentWebhookId = null;
+    document.getElementById('webhookModalTitle').textContent = 'Add Webhook';
+    document.getElementById('webhookForm').reset();
+    document.getElementById('eventCreated').checked = true;
+    document.getElementById('eventUpdated').checked = true;
+    document.getElementById('eventDeleted').checked = true;
+    document.getElementById('webhookActive').checked = true;
+    new bootstrap.Modal(document.getElementById('webhookModal')).show();
+}
+
+function editWebhook(id) {
+    currentWebhookId = id;
+    document.getElementById('webhookModalTitle').textContent = 'Edit Webhook';
+
+    fetch(`/api/webhooks`)
+    .then(response => response.json())
+    .then(webhooks => {
+        const webhook = webhooks.find(w => w.id === id);
+        if (webhook) {
+            document.getElementById('webhookName').value = webhook.name;
+            document.getElementById('webhookUrl').value = webhook.url;
+            document.getElementById('webhookSecret').value = webhook.secret || '';
+            document.getElementById('webhookActive').checked = webhook.active;
+
+            // Update event checkboxes
+            document.getElementById('eventCreated').checked = webhook.event_types.includes('product.created');
+            document.getElementById('eventUpdated').checked = webhook.event_types.includes('product.updated');
+            document.getElementById('eventDeleted').checked = webhook.event_types.includes('product.deleted');
+
+            new bootstrap.Modal(document.getElementById('webhookModal')).show();
+        }
+    });
+}
+
+function saveWebhook() {
+    const form = document.getElementById('webhookForm');
+    if (!form.checkValidity()) {
+        form.reportValidity();
+        return;
+    }
+
+    const eventTypes = [];
+    if (document.getElementById('eventCreated').checked) eventTypes.push('product.created');
+    if (document.getElementById('eventUpdated').checked) eventTypes.push('product.updated');
+    if (document.getElementById('eventDeleted').checked) eventTypes.push('product.deleted');
+
+    const data = {
+        name: document.getElementById('webhookName').value,
+        url: document.getElementById('webhookUrl').value,
+        event_types: eventTypes,
+        secret: document.getElementById('webhookSecret').value || null,
+        active: document.getElementById('webhookActive').checked
+    };
+
+    const url = currentWebhookId ? `/api/webhooks/${currentWebhookId}` : '/api/webhooks';
+    const method = currentWebhookId ? 'PUT' : 'POST';
+
+    fetch(url, {
+        method: method,
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify(data)
+    })
+    .then(response => response.json())
+    .then(result => {
+        if (result.error) {
+            throw new Error(result.error);
+        }
+
+        bootstrap.Modal.getInstance(document.getElementById('webhookModal')).hide();
+        loadWebhooks();
+        showAlert(currentWebhookId ? 'Webhook updated successfully!' : 'Webhook created successfully!', 'success');
+    })
+    .catch(error => {
+        showAlert(error.message, 'danger');
+    });
+}
+
+function testWebhook(id) {
+    fetch(`/api/webhooks/${id}/test`, {
+        method: 'POST'
+    })
+    .then(response => response.json())
+    .then(result => {
+        if (result.error) {
+            throw new Error(result.error);
+        }
+        showAlert('Webhook test triggered! Check the webhook endpoint for the test payload.', 'info');
+        loadWebhooks(); // Refresh to show updated last_triggered time
+    })
+    .catch(error => {
+        showAlert(error.message, 'danger');
+    });
+}
+
+function deleteWebhook(id) {
+    if (!confirm('Are you sure you want to delete this webhook?')) {
+        return;
+    }
+
+    fetch(`/api/webhooks/${id}`, {
+        method: 'DELETE'
+    })
+    .then(response => response.json())
+    .then(result => {
+        if (result.error) {
+            throw new Error(result.error);
+        }
+        loadWebhooks();
+        showAlert('Webhook deleted successfully!', 'success');
+    })
+    .catch(error => {
+        showAlert(error.message, 'danger');
+    });
+}
+
+// Utility Functions
+function showAlert(message, type) {
+    // Remove existing alerts
+    document.querySelectorAll('.alert-dismissible').forEach(alert => alert.remove());
+
+    const alertHtml = `
+        <div class="alert alert-${type} alert-dismissible fade show mt-3" role="alert">
+            ${message}
+            <button type="button" class="btn-close" data-bs-dismiss="alert"></button>
+        </div>
+    `;
+
+    document.querySelector('.container').insertAdjacentHTML('afterbegin', alertHtml);
+
+    // Auto dismiss after 5 seconds
+    setTimeout(() => {
+        const alerts = document.querySelectorAll('.alert-dismissible');
+        alerts.forEach(alert => {
+            const bsAlert = new bootstrap.Alert(alert);
+            bsAlert.close();
+        });
+    }, 5000);
+}
+
+function formatDate(dateString) {
+    if (!dateString) return 'N/A';
+    return new Date(dateString).toLocaleDateString('en-US', {
+        year: 'numeric',
+        month: 'short',
+        day: 'numeric',
+        hour: '2-digit',
+        minute: '2-digit'
+    });
+}
@@ -0,0 +1,771 @@
+"""
+Webhook delivery backends
+submit() never blocks: each delivery is put on its webhook's bounded
+DeliveryQueue, which is drained by at most the webhook's concurrency limit
+of workers. The default backend's workers are threads. The async backend
+runs an asyncio event loop in one dedicated thread and delivers over pooled
+keep-alive connections, so a single worker can keep thousands of deliveries
+in flight. Select it with WEBHOOK_DELIVERY_BACKEND=async (requires aiohttp).
+
+Each event is a WebhookEvent whose JSON bytes (and gzip bytes, for
+webhooks with accepts_gzip) are built once and reused for every subscriber
+and retry. Deliveries are signed with HMAC-SHA256 over "<timestamp>.<body>"
+(the uncompressed JSON), sent as X-Webhook-Timestamp and X-Webhook-Signature
+(sha256=<hex>); receivers check it with verify_signature().
+
+Delivery outcomes are not written per delivery: DeliveryStats buffers them
+and flushes one batched update per webhook every WEBHOOK_STATUS_FLUSH_SECONDS.
+"""
+import asyncio
+import atexit
+import gzip
+import hashlib
+import hmac
+import json
+import os
+import threading
+import time
+from collections import deque
+from functools import lru_cache
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+import requests
+from sqlalchemy import bindparam, select
+from models import db, Webhook, latency_bucket
+from db_pools import use_pool, WEBHOOK_POOL
+
+DELIVERY_TIMEOUT_SECONDS = 10
+RETRY_BACKOFF_SECONDS = 1
+MAX_RETRY_AFTER_SECONDS = 300
+STARTUP_TIMEOUT_SECONDS = 10
+OVERFLOW_POLICIES = ('coalesce', 'drop')
+
+def delivery_target(webhook):
+    """Plain snapshot of a webhook, safe to use outside the session that loaded it"""
+    return {
+        'id': webhook.id,
+        'url': webhook.url,
+        'headers': dict(webhook.headers or {}),
+        'secret': webhook.secret,
+        'accepts_gzip': bool(webhook.accepts_gzip),
+        'rate_limit_per_second': webhook.rate_limit_per_second,
+        'max_concurrency': webhook.max_concurrency,
+        'adaptive_concurrency': bool(webhook.adaptive_concurrency),
+    }
+
+def serialize_payload(payload):
+    """Encode an event payload once; the bytes are shared by every subscriber"""
+    return json.dumps(payload, separators=(',', ':')).encode('utf-8')
+
+@lru_cache(maxsize=1024)
+def _signing_key(secret):
+    # Keyed HMAC state is computed once per secret and copied per delivery
+    return hmac.new(secret.encode('utf-8'), digestmod=hashlib.sha256)
+
+def sign_payload(secret, body, timestamp):
+    mac = _signing_key(secret).copy()
+    mac.update(f'{timestamp}.'.encode('ascii'))
+    mac.update(body)
+    return f'sha256={mac.hexdigest()}'
+
+def verify_signature(secret, body, timestamp, signature, tolerance_seconds=300):
+    """Receiver-side check: signature matches and the timestamp is recent"""
+    try:
+        if abs(time.time() - int(timestamp)) > tolerance_seconds:
+            return False
+    except (TypeError, ValueError):
+        return False
+    return hmac.compare_digest(sign_payload(secret, body, timestamp), signature or '')
+
+class WebhookEvent:
+    """One event fanned out to many subscribers.
+
+    The payload dict, its JSON encoding and its gzip encoding are each built
+    at most once, on first use, and then shared by every delivery and retry.
+    """
+    __slots__ = ('event_type', 'data', 'timestamp', '_payload', '_body', '_gzip_body')
+
+    def __init__(self, event_type, data, timestamp=None):
+        self.event_type = event_type
+        self.data = data
+        self.timestamp = timestamp or datetime.utcnow().isoformat()
+        self._payload = None
+        self._body = None
+        self._gzip_body = None
+
+    @property
+    def payload(self):
+        if self._payload is None:
+            self._payload = {
+                'event_type': self.event_type,
+                'timestamp': self.timestamp,
+                'data': self.data
+            }
+        return self._payload
+
+    @property
+    def body(self):
+        if self._body is None:
+            self._body = serialize_payload(self.payload)
+        return self._body
+
+    @property
+    def gzip_body(self):
+        if self._gzip_body is None:
+            self._gzip_body = gzip.compress(self.body, compresslevel=6)
+        return self._gzip_body
+
+def build_headers(target, body):
+    headers = {'Content-Type': 'application/json'}
+    if target['headers']:
+        headers.update(target['headers'])
+
+    # Sign the exact bytes being sent; the secret itself never leaves the server
+    if target['secret']:
+        timestamp = str(int(time.time()))
+        headers['X-Webhook-Timestamp'] = timestamp
+        headers['X-Webhook-Signature'] = sign_payload(target['secret'], body, timestamp)
+    return headers
+
+def prepare_request(target, event, gzip_min_bytes):
+    """Request body and headers for one delivery attempt to one subscriber"""
+    headers = build_headers(target, event.body)
+    if target['accepts_gzip'] and len(event.body) >= gzip_min_bytes:
+        headers['Content-Encoding'] = 'gzip'
+        return event.gzip_body, headers
+    return event.body, headers
+
+def should_retry(status_code, error):
+    return error is not None or status_code >= 500 or status_code == 429
+
+def retry_after_seconds(value):
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date), capped"""
+    if not value:
+        return None
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            seconds = (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds()
+        except (TypeError, ValueError):
+            return None
+    return min(max(seconds, 0.0), MAX_RETRY_AFTER_SECONDS)
+
+def coalesce_key(event):
+    """Deliveries with the same key carry successive states of one product"""
+    product_id = event.data.get('id') if isinstance(event.data, dict) else None
+    return (event.event_type, product_id) if product_id is not None else None
+
+class DeliveryQueue:
+    """Bounded FIFO of pending deliveries to one webhook.
+
+    put() starts a worker only while fewer than the webhook's
+    WebhookLimiter.max_workers are draining the queue. When the queue is full, overflow='coalesce'
+    replaces a queued delivery of the same event for the same product with
+    the newer one (the subscriber only misses an intermediate state); any
+    other overflowing delivery is dropped.
+    """
+
+    def __init__(self, max_size, overflow):
+        self.lock = threading.Lock()
+        self.entries = deque()
+        self.keyed = {}
+        self.max_size = max_size
+        self.overflow = overflow
+        self.workers = 0
+
+    def put(self, target, event, max_workers):
+        """Queue a delivery; returns ('queued'|'coalesced'|'dropped', start_worker)"""
+        key = coalesce_key(event)
+        with self.lock:
+            if len(self.entries) >= self.max_size:
+                entry = self.keyed.get(key) if key and self.overflow == 'coalesce' else None
+                if entry is None:
+                    return 'dropped', False
+                entry[1], entry[2] = target, event
+                return 'coalesced', False
+            entry = [key, target, event]
+            self.entries.append(entry)
+            if key:
+                self.keyed[key] = entry
+            if self.workers < max_workers:
+                self.workers += 1
+                return 'queued', True
+            return 'queued', False
+
+    def take(self, max_workers):
+        """Next (target, event) for a worker, or None when the worker should stop"""
+        with self.lock:
+            # Surplus workers (the adaptive limit went down) stop early
+            if not self.entries or self.workers > max_workers:
+                self.workers -= 1
+                return None
+            key, target, event = entry = self.entries.popleft()
+            if key and self.keyed.get(key) is entry:
+                del self.keyed[key]
+            return target, event
+
+    def worker_failed(self):
+        """A worker put() asked for could not be started"""
+        with self.lock:
+            self.workers -= 1
+
+    def __len__(self):
+        return len(self.entries)
+
+class WebhookLimiter:
+    """Per-webhook send budget: token-bucket rate, in-flight cap, adaptive concurrency.
+
+    The in-flight cap is max_concurrency (or the backend default). In adaptive
+    mode it follows AIMD: it is halved, at most once per DECREASE_COOLDOWN,
+    on 429/503 responses, connection errors, or latency above
+    LATENCY_TOLERANCE times the endpoint's best recent latency. After each
+    full round of healthy deliveries it rises by one, up to the cap. A
+    Retry-After header pauses all sends to the webhook until it has passed.
+    Limits (and the webhook's DeliveryQueue) are per worker process.
+    """
+
+    DECREASE_COOLDOWN = 1.0
+    LATENCY_TOLERANCE = 2.0
+
+    def __init__(self, target, default_concurrency, queue_size=10000, overflow='coalesce'):
+        self.lock = threading.Lock()
+        self.queue = DeliveryQueue(queue_size, overflow)
+        self.slot_freed = threading.Condition(self.lock)
+        self.default_concurrency = default_concurrency
+        self.in_flight = 0
+        self.limit = None
+        self.paused_until = 0.0
+        self.base_latency_ms = None
+        self.healthy = 0
+        self.decreased_at = 0.0
+        self.configure(target)
+        self.tokens = self.burst or 0.0
+        self.refilled_at = time.monotonic()
+
+    def settings(self, target):
+        return (target.get('rate_limit_per_second'), target.get('max_concurrency'), target.get('adaptive_concurrency'))
+
+    def configure(self, target):
+        """Apply (possibly edited) webhook settings, keeping adaptive state"""
+        with self.lock:
+            self.current_settings = self.settings(target)
+            rate, max_concurrency, adaptive = self.current_settings
+            self.rate = rate or None
+            self.burst = max(1.0, rate) if rate else None  # up to one second's worth at once
+            self.max_concurrency = max_concurrency or self.default_concurrency
+            self.adaptive = bool(adaptive)
+            if self.limit is None or not self.adaptive:
+                self.limit = self.max_concurrency
+            else:
+                self.limit = min(self.limit, self.max_concurrency)
+            self.slot_freed.notify_all()
+
+    @property
+    def max_workers(self):
+        """Workers worth draining the queue with: a rate-limited webhook can't
+        use more than one second's worth of sends at once"""
+        if self.rate:
+            return min(self.limit, max(1, int(self.burst)))
+        return self.limit
+
+    def try_acquire(self):
+        with self.lock:
+            if self.in_flight >= self.limit:
+                return False
+            self.in_flight += 1
+            return True
+
+    def acquire(self):
+        """Block until a delivery slot is free (thread backend)"""
+        with self.slot_freed:
+            while self.in_flight >= self.limit:
+                self.slot_freed.wait()
+            self.in_flight += 1
+
+    def release(self):
+        with self.slot_freed:
+            self.in_flight -= 1
+            self.slot_freed.notify_all()
+
+    def delay(self):
+        """Seconds to wait before sending; takes a token when rate limited"""
+        with self.lock:
+            now = time.monotonic()
+            wait = max(0.0, self.paused_until - now)
+            if self.rate:
+                self.tokens = min(self.burst, self.tokens + (now - self.refilled_at) * self.rate)
+                self.refilled_at = now
+                # Going negative reserves a future token, so waiters queue up
+                self.tokens -= 1
+                if self.tokens < 0:
+                    wait = max(wait, -self.tokens / self.rate)
+            return wait
+
+    def on_result(self, status_code, latency_ms, retry_after=None):
+        with self.slot_freed:
+            now = time.monotonic()
+            if retry_after:
+                self.paused_until = max(self.paused_until, now + retry_after)
+            if not self.adaptive:
+                return
+
+            overloaded = status_code is None or status_code in (429, 503)
+            if not overloaded and latency_ms is not None:
+                if self.base_latency_ms is None or latency_ms < self.base_latency_ms:
+                    self.base_latency_ms = latency_ms
+                else:
+                    # Let the baseline drift up slowly so it follows the endpoint
+                    self.base_latency_ms += (latency_ms - self.base_latency_ms) * 0.01
+                overloaded = latency_ms > self.LATENCY_TOLERANCE * self.base_latency_ms
+
+            if overloaded:
+                self.healthy = 0
+                if now - self.decreased_at >= self.DECREASE_COOLDOWN:
+                    self.limit = max(1, self.limit // 2)
+                    self.decreased_at = now
+            elif status_code < 400:
+                self.healthy += 1
+                if self.healthy >= self.limit and self.limit < self.max_concurrency:
+                    self.limit += 1
+                    self.healthy = 0
+                    self.slot_freed.notify_all()
+
+class WebhookLimiters:
+    """One WebhookLimiter per webhook id, reconfigured when its settings change"""
+
+    def __init__(self, default_concurrency, queue_size=10000, overflow='coalesce'):
+        self.default_concurrency = default_concurrency
+        self.queue_size = queue_size
+        self.overflow = overflow if overflow in OVERFLOW_POLICIES else 'coalesce'
+        self.lock = threading.Lock()
+        self.limiters = {}
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(
+            config.get('WEBHOOK_MAX_CONCURRENCY_PER_WEBHOOK', 50),
+            queue_size=config.get('WEBHOOK_QUEUE_SIZE', 10000),
+            overflow=config.get('WEBHOOK_QUEUE_OVERFLOW', 'coalesce')
+        )
+
+    def get(self, target):
+        with self.lock:
+            limiter = self.limiters.get(target['id'])
+            if limiter is None:
+                limiter = self.limiters[target['id']] = WebhookLimiter(
+                    target, self.default_concurrency, self.queue_size, self.overflow
+                )
+                return limiter
+        if limiter.current_settings != limiter.settings(target):
+            limiter.configure(target)
+        return limiter
+
+def delivery_succeeded(status_code, error):
+    return error is None and status_code is not None and status_code < 400
+
+class DeliveryStats:
+    """Delivery outcomes buffered in memory and written in batches.
+
+    record() and record_overflow() only update a dict. A daemon thread
+    flushes every WEBHOOK_STATUS_FLUSH_SECONDS in one transaction that updates
+    each webhook with activity once: last_* fields from its latest delivery,
+    success, failure, dropped and coalesced counters incremented, latency
+    histogram merged.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.interval = app.config.get('WEBHOOK_STATUS_FLUSH_SECONDS', 1)
+        self.lock = threading.Lock()
+        self.pending = {}
+        self.thread = None
+
+    def _stats(self, webhook_id):
+        # Called with self.lock held
+        stats = self.pending.get(webhook_id)
+        if stats is None:
+            stats = self.pending[webhook_id] = {
+                'successes': 0, 'failures': 0, 'dropped': 0, 'coalesced': 0, 'latencies': {}
+            }
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._run, name='webhook-stats', daemon=True)
+            self.thread.start()
+            atexit.register(self.flush)
+        return stats
+
+    def record(self, webhook_id, status_code, error, latency_ms=None):
+        with self.lock:
+            stats = self._stats(webhook_id)
+            if delivery_succeeded(status_code, error):
+                stats['successes'] += 1
+            else:
+                stats['failures'] += 1
+            if latency_ms is not None:
+                bucket = str(latency_bucket(latency_ms))
+                stats['latencies'][bucket] = stats['latencies'].get(bucket, 0) + 1
+            stats['last'] = (datetime.utcnow(), status_code, error)
+
+    def record_overflow(self, webhook_id, outcome):
+        """Count a delivery that was 'dropped' or 'coalesced' by a full queue"""
+        with self.lock:
+            self._stats(webhook_id)[outcome] += 1
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            self.flush()
+
+    def _requeue(self, pending):
+        """Put stats from a failed flush back, merged with anything recorded since"""
+        with self.lock:
+            for webhook_id, stats in pending.items():
+                current = self.pending.get(webhook_id)
+                if current is None:
+                    self.pending[webhook_id] = stats
+                    continue
+                for counter in ('successes', 'failures', 'dropped', 'coalesced'):
+                    current[counter] += stats[counter]
+                if 'last' in stats:
+                    current.setdefault('last', stats['last'])
+                for bucket, count in stats['latencies'].items():
+                    current['latencies'][bucket] = current['latencies'].get(bucket, 0) + count
+
+    def flush(self):
+        """Write buffered outcomes; returns the number of webhook rows updated"""
+        with self.lock:
+            pending, self.pending = self.pending, {}
+        if not pending:
+            return 0
+
+        table = Webhook.__table__
+        with self.app.app_context():
+            use_pool(db.session, WEBHOOK_POOL)
+            try:
+                # Lock rows in id order so concurrent flushes from other
+                # workers can't deadlock while merging histograms
+                rows = db.session.execute(
+                    select(table.c.id, table.c.latency_histogram)
+                    .where(table.c.id.in_(pending))
+                    .order_by(table.c.id)
+                    .with_for_update()
+                ).all()
+                updates, counter_updates = [], []
+                for webhook_id, histogram in rows:
+                    stats = pending[webhook_id]
+                    counters = {
+                        'webhook_id': webhook_id,
+                        'successes': stats['successes'],
+                        'failures': stats['failures'],
+                        'dropped': stats['dropped'],
+                        'coalesced': stats['coalesced'],
+                    }
+                    if 'last' not in stats:
+                        # Only queue overflows since the last flush
+                        counter_updates.append(counters)
+                        continue
+                    histogram = dict(histogram or {})
+                    for bucket, count in stats['latencies'].items():
+                        histogram[bucket] = histogram.get(bucket, 0) + count
+                    last_triggered, status_code, error = stats['last']
+                    updates.append({
+                        **counters,
+                        'last_triggered': last_triggered,
+                        'last_response_code': status_code,
+                        'last_error': error,
+                        'latency_histogram': histogram,
+                    })
+                counter_values = dict(
+                    success_count=table.c.success_count + bindparam('successes'),
+                    failure_count=table.c.failure_count + bindparam('failures'),
+                    dropped_count=table.c.dropped_count + bindparam('dropped'),
+                    coalesced_count=table.c.coalesced_count + bindparam('coalesced'),
+                    # Delivery stats aren't configuration changes
+                    updated_at=table.c.updated_at
+                )
+                if updates:
+                    db.session.execute(
+                        table.update()
+                        .where(table.c.id == bindparam('webhook_id'))
+                        .values(
+                            last_triggered=bindparam('last_triggered'),
+                            last_response_code=bindparam('last_response_code'),
+                            last_error=bindparam('last_error'),
+                            latency_histogram=bindparam('latency_histogram', type_=table.c.latency_histogram.type),
+                            **counter_values
+                        ),
+                        updates
+                    )
+                if counter_updates:
+                    db.session.execute(
+                        table.update()
+                        .where(table.c.id == bindparam('webhook_id'))
+                        .values(**counter_values),
+                        counter_updates
+                    )
+                db.session.commit()
+                return len(updates) + len(counter_updates)
+            except Exception as e:
+                db.session.rollback()
+                print(f"Error saving webhook delivery stats: {e}")
+                self._requeue(pending)
+                return 0
+
+class ThreadDeliveryBackend:
+    """Worker threads per webhook, started on demand, delivering with requests"""
+
+    def __init__(self, app):
+        self.app = app
+        self.max_retries = app.config.get('WEBHOOK_MAX_RETRIES', 2)
+        self.gzip_min_bytes = app.config.get('WEBHOOK_GZIP_MIN_BYTES', 1024)
+        self.stats = DeliveryStats(app)
+        self.limiters = WebhookLimiters.from_config(app.config)
+
+    def _drain(self, limiter):
+        while True:
+            item = limiter.queue.take(limiter.max_workers)
+            if item is None:
+                return
+            try:
+                self._send(limiter, *item)
+            except Exception as e:
+                # Keep draining; a dead worker would leave its queue stuck
+                print(f"Error delivering webhook: {e}")
+
+    def _send(self, limiter, target, event):
+        for attempt in range(self.max_retries + 1):
+            status_code, error, latency_ms, retry_after = None, None, None, None
+            limiter.acquire()
+            try:
+                wait = limiter.delay()
+                if wait:
+                    time.sleep(wait)
+                body, headers = prepare_request(target, event, self.gzip_min_bytes)
+                started = time.perf_counter()
+                response = requests.post(
+                    target['url'],
+                    data=body,
+                    headers=headers,
+                    timeout=DELIVERY_TIMEOUT_SECONDS
+                )
+                latency_ms = (time.perf_counter() - started) * 1000
+                status_code = response.status_code
+                retry_after = retry_after_seconds(response.headers.get('Retry-After'))
+            except Exception as e:
+                error = str(e)
+            finally:
+                limiter.on_result(status_code, latency_ms, retry_after)
+                limiter.release()
+
+            if attempt == self.max_retries or not should_retry(status_code, error):
+                break
+            time.sleep(RETRY_BACKOFF_SECONDS * 2 ** attempt)
+
+        self.stats.record(target['id'], status_code, error, latency_ms)
+
+    def submit(self, targets, event):
+        for target in targets:
+            limiter = self.limiters.get(target)
+            outcome, start_worker = limiter.queue.put(target, event, limiter.max_workers)
+            if outcome != 'queued':
+                self.stats.record_overflow(target['id'], outcome)
+            if start_worker:
+                try:
+                    threading.Thread(
+                        target=self._drain,
+                        args=(limiter,),
+                        name=f"webhook-{target['id']}",
+                        daemon=True
+                    ).start()
+                except RuntimeError:
+                    limiter.queue.worker_failed()
+                    raise
+
+class AsyncDeliveryBackend:
+    """asyncio + aiohttp delivery on an event loop owned by a daemon thread.
+
+    Connections are pooled and kept alive per host. Concurrency is capped
+    per webhook (WebhookLimiter: the webhook's max_concurrency or
+    WEBHOOK_MAX_CONCURRENCY_PER_WEBHOOK, adaptive and rate limits) and
+    globally (WEBHOOK_MAX_IN_FLIGHT). Each webhook's DeliveryQueue holds at
+    most WEBHOOK_QUEUE_SIZE deliveries, so memory stays flat under sustained
+    fan-out without ever blocking the caller.
+    """
+
+    def __init__(self, app):
+        import aiohttp  # optional dependency, only needed for this backend
+
+        self.app = app
+        self.aiohttp = aiohttp
+        self.max_retries = app.config.get('WEBHOOK_MAX_RETRIES', 2)
+        self.gzip_min_bytes = app.config.get('WEBHOOK_GZIP_MIN_BYTES', 1024)
+        self.max_in_flight = app.config.get('WEBHOOK_MAX_IN_FLIGHT', 1000)
+        self.limiters = WebhookLimiters.from_config(app.config)
+        self.per_host = app.config.get('WEBHOOK_MAX_CONNECTIONS_PER_HOST', 100)
+        self.stats = DeliveryStats(app)
+
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self._run, name='webhook-delivery', daemon=True)
+        self.thread.start()
+        try:
+            # Any startup error is re-raised here, so the caller can fall back
+            asyncio.run_coroutine_threadsafe(self._open_session(), self.loop).result(timeout=STARTUP_TIMEOUT_SECONDS)
+        except BaseException:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.thread.join(timeout=STARTUP_TIMEOUT_SECONDS)
+            raise
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.loop.run_forever()
+        finally:
+            self.loop.close()
+
+    async def _open_session(self):
+        # aiohttp needs a running loop to build its connector and session
+        self.in_flight = asyncio.Semaphore(self.max_in_flight)
+        self.slot_freed = {}
+        self.session = self.aiohttp.ClientSession(
+            connector=self.aiohttp.TCPConnector(
+                limit=self.max_in_flight,
+                limit_per_host=self.per_host,
+                keepalive_timeout=30
+            ),
+            timeout=self.aiohttp.ClientTimeout(total=DELIVERY_TIMEOUT_SECONDS)
+        )
+
+    def _slot_freed(self, webhook_id):
+        condition = self.slot_freed.get(webhook_id)
+        if condition is None:
+            condition = self.slot_freed[webhook_id] = asyncio.Condition()
+        return condition
+
+    async def _attempt(self, limiter, target, event):
+        slot_freed = self._slot_freed(target['id'])
+        async with slot_freed:
+            await slot_freed.wait_for(limiter.try_acquire)
+
+        status_code, error, latency_ms, retry_after = None, None, None, None
+        try:
+            # Wait for a rate-limit token before taking a global slot
+            wait = limiter.delay()
+            if wait:
+                await asyncio.sleep(wait)
+            async with self.in_flight:
+                body, headers = prepare_request(target, event, self.gzip_min_bytes)
+                started = time.perf_counter()
+                async with self.session.post(target['url'], data=body, headers=headers) as response:
+                    await response.read()
+                    status_code = response.status
+                    latency_ms = (time.perf_counter() - started) * 1000
+                    retry_after = retry_after_seconds(response.headers.get('Retry-After'))
+        except Exception as e:
+            error = str(e) or e.__class__.__name__
+        finally:
+            limiter.on_result(status_code, latency_ms, retry_after)
+            limiter.release()
+            async with slot_freed:
+                slot_freed.notify_all()
+        return status_code, error, latency_ms
+
+    async def _drain(self, limiter):
+        while True:
+            item = limiter.queue.take(limiter.max_workers)
+            if item is None:
+                return
+            try:
+                await self._send(limiter, *item)
+            except Exception as e:
+                print(f"Error delivering webhook: {e}")
+
+    async def _send(self, limiter, target, event):
+        for attempt in range(self.max_retries + 1):
+            status_code, error, latency_ms = await self._attempt(limiter, target, event)
+            if attempt == self.max_retries or not should_retry(status_code, error):
+                break
+            # Back off without holding a concurrency slot
+            await asyncio.sleep(RETRY_BACKOFF_SECONDS * 2 ** attempt)
+        # Only buffers the outcome; the database write happens in the stats flusher thread
+        self.stats.record(target['id'], status_code, error, latency_ms)
+
+    def submit(self, targets, event):
+        for target in targets:
+            limiter = self.limiters.get(target)
+            outcome, start_worker = limiter.queue.put(target, event, limiter.max_workers)
+            if outcome != 'queued':
+                self.stats.record_overflow(target['id'], outcome)
+            if start_worker:
+                asyncio.run_coroutine_threadsafe(self._drain(limiter), self.loop)
+
+_subscribers = {'loaded_at': None, 'targets': []}
+_subscribers_lock = threading.Lock()
+
+def invalidate_subscribers():
+    """Drop the cached subscriber list after a webhook is created, changed or deleted"""
+    with _subscribers_lock:
+        _subscribers['loaded_at'] = None
+
+def matching_targets(app, event_type):
+    """Active webhooks subscribed to event_type, from a short-lived per-process cache.
+
+    Other workers pick up webhook changes within WEBHOOK_SUBSCRIBER_CACHE_SECONDS.
+    """
+    ttl = app.config.get('WEBHOOK_SUBSCRIBER_CACHE_SECONDS', 5)
+    with _subscribers_lock:
+        loaded_at = _subscribers['loaded_at']
+        if loaded_at is None or time.monotonic() - loaded_at >= ttl:
+            with app.app_context():
+                use_pool(db.session, WEBHOOK_POOL)
+                webhooks = Webhook.query.filter(Webhook.active == True).all()
+                _subscribers['targets'] = [
+                    (set(webhook.event_types or []), delivery_target(webhook))
+                    for webhook in webhooks
+                ]
+            _subscribers['loaded_at'] = time.monotonic()
+        targets = _subscribers['targets']
+    return [target for event_types, target in targets if event_type in event_types]
+
+_backend = None
+_backend_lock = threading.Lock()
+
+def get_delivery_backend(app):
+    """Process-wide delivery backend, created on first use"""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = _create_backend(app)
+    return _backend
+
+def _gevent_patched():
+    try:
+        from gevent import monkey
+    except ImportError:
+        return False
+    return monkey.is_module_patched('threading')
+
+def _create_backend(app):
+    if app.config.get('WEBHOOK_DELIVERY_BACKEND') == 'async':
+        if _gevent_patched():
+            # Under gevent the "threads" are already greenlets on one hub;
+            # a second (asyncio) event loop would block it
+            print("⚠️ gevent workers deliver webhooks with greenlets, ignoring WEBHOOK_DELIVERY_BACKEND=async")
+            return ThreadDeliveryBackend(app)
+        try:
+            return AsyncDeliveryBackend(app)
+        except ImportError:
+            print("⚠️ aiohttp is not installed, falling back to threaded webhook delivery")
+        except Exception as e:
+            print(f"⚠️ Async webhook delivery failed to start ({e!r}), falling back to threaded delivery")
+    return ThreadDeliveryBackend(app)
+
+def _reset_after_fork():
+    """Forked workers start without the parent's delivery threads, loop or locks"""
+    global _backend, _backend_lock, _subscribers_lock
+    _backend = None
+    _backend_lock = threading.Lock()
+    _subscribers_lock = threading.Lock()
+    _subscribers.update(loaded_at=None, targets=[])
+
+os.register_at_fork(after_in_child=_reset_after_fork)